@@ -0,0 +1,134 @@
+"""Benchmark packet-to-state latency and throughput of the coordinator.
+
+The simulated bridge runs in a separate process and sends timestamped status
+packets at increasing rates. CN360Bridge and CN360Coordinator run on a fake
+hass, a key listener reading the published data stands in for an entity and
+records the latency from send to state. The highest rate received in full
+with a p99 latency below --max-p99 is reported as sustainable.
+
+Needs Home Assistant installed, the simulator uses time.monotonic() across
+processes, which is system wide on Linux.
+
+    python benchmarks/bench_coordinator.py --rates 100,1000,10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+from typing import Any
+
+from common import FakeHass, load_integration, percentile
+from simulator import BridgeSimulator
+
+bridge_module = load_integration("bridge")
+coordinator_module = load_integration("coordinator")
+
+# Latencies of the first packets include connecting and are dropped
+WARMUP = 0.5  # seconds
+
+
+def run_simulator(port_queue: multiprocessing.Queue, options: dict[str, Any]) -> None:
+    """Serve simulated packets until terminated."""
+
+    async def serve() -> None:
+        simulator = BridgeSimulator(timestamps=True, **options)
+        port_queue.put(await simulator.start())
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def measure(
+    port: int, robots: list[str], duration: float, transport: str
+) -> tuple[int, list[float], float]:
+    """Return the packets received, their latencies and the CPU time used."""
+    hass = FakeHass()
+    bridge = bridge_module.CN360Bridge(hass, "127.0.0.1", port, transport, 0)
+    bridge.async_start()
+    latencies: list[float] = []
+    received = 0
+    recording = False
+
+    def add_robot(sn: str) -> Any:
+        coordinator = coordinator_module.CN360Coordinator(hass, bridge, sn)
+
+        def on_update() -> None:
+            nonlocal received
+            if recording:
+                sent = coordinator.getRobotData()["benchSent"]
+                latencies.append(time.monotonic() - sent)
+                received += 1
+
+        coordinator.async_add_key_listener(on_update, ("benchSent",))
+        return coordinator
+
+    coordinators = [add_robot(sn) for sn in robots]
+    await asyncio.sleep(WARMUP)
+    recording = True
+    cpu = time.process_time()
+    await asyncio.sleep(duration)
+    cpu = time.process_time() - cpu
+    recording = False
+    for coordinator in coordinators:
+        await coordinator.async_disconnect()
+    return received, latencies, cpu
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rates",
+        default="50,200,1000,5000,20000",
+        help="status packets/s per robot, comma separated",
+    )
+    parser.add_argument("--robots", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--transport", default="stream", choices=["stream", "protocol"])
+    parser.add_argument(
+        "--max-p99", type=float, default=100.0, help="sustainable p99 in ms"
+    )
+    args = parser.parse_args()
+    robots = [robot.sn for robot in BridgeSimulator(robots=args.robots).robots]
+
+    print(f"{args.robots} robot(s), {args.transport} transport")
+    print(
+        f"{'offered/s':>10} {'received/s':>11} {'p50 ms':>8} {'p99 ms':>8}"
+        f" {'max ms':>8} {'cpu %':>6}"
+    )
+    sustainable = 0.0
+    for rate in (float(rate) for rate in args.rates.split(",")):
+        port_queue: multiprocessing.Queue = multiprocessing.Queue()
+        server = multiprocessing.Process(
+            target=run_simulator,
+            args=(port_queue, {"robots": args.robots, "robot_rate": rate}),
+            daemon=True,
+        )
+        server.start()
+        try:
+            received, latencies, cpu = asyncio.run(
+                measure(port_queue.get(), robots, args.duration, args.transport)
+            )
+        finally:
+            server.terminate()
+
+        offered = rate * args.robots
+        achieved = received / args.duration
+        p99 = percentile(latencies, 0.99) * 1000
+        print(
+            f"{offered:>10,.0f} {achieved:>11,.0f}"
+            f" {percentile(latencies, 0.5) * 1000:>8.2f} {p99:>8.2f}"
+            f" {max(latencies, default=0) * 1000:>8.2f}"
+            f" {cpu / args.duration * 100:>6.0f}"
+        )
+        if achieved >= 0.98 * offered and p99 <= args.max_p99:
+            sustainable = offered
+
+    print(f"max sustainable rate: {sustainable:,.0f} packets/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark decoding robot messages.
+
+Compares stdlib json.loads with picking fields by hand, like the coordinator
+used to, against protocol.decode_message with and without orjson.
+
+    python benchmarks/bench_decode.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from common import load_module, make_robot_stream
+
+protocol = load_module("protocol")
+
+
+def legacy_decode(data: bytes) -> dict:
+    """Decode a payload the way the coordinator used to."""
+    payload = json.loads(data)
+    if payload.get("origin") == "robot":
+        payload.pop("origin", None)
+        payload.get("sn")
+        payload.get("robot_connected")
+        payload.get("cloud_connected")
+        if not payload.get("data", None) and payload.get("cache", None):
+            return payload.get("cache", {})
+        return payload.get("data", {}).get("data", {})
+    return payload
+
+
+def measure(label: str, decode, payloads: list[bytes], maps: list[bytes]) -> None:
+    """Print the CPU time per payload for all and for map payloads."""
+    results = []
+    for items in (payloads, maps):
+        start = time.process_time()
+        for item in items:
+            decode(item)
+        results.append((time.process_time() - start) / len(items) * 1e6)
+    print(f"{label:<24} {results[0]:>10.2f} {results[1]:>12.2f}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000)
+    args = parser.parse_args()
+
+    stream, _ = make_robot_stream(args.frames)
+    payloads = protocol.FrameDecoder().feed(stream)
+    maps = [payload for payload in payloads if b"smartArea" in payload]
+
+    print(f"{'decoder':<24} {'us/payload':>10} {'us/smartArea':>12}")
+    measure("json + dict picking", legacy_decode, payloads, maps)
+    orjson = protocol.orjson
+    protocol.orjson = None
+    try:
+        measure("decode_message (json)", protocol.decode_message, payloads, maps)
+    finally:
+        protocol.orjson = orjson
+    if orjson is not None:
+        measure("decode_message (orjson)", protocol.decode_message, payloads, maps)
+
+
+if __name__ == "__main__":
+    main()
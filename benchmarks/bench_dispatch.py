@@ -0,0 +1,234 @@
+"""Benchmark dispatching robot packets to entities.
+
+N robots share one CN360Bridge on a fake hass, each with at least M entities
+created by setting up the integration's platforms (the map image is left out,
+its rendering is covered by bench_map_render.py). Status packets are fed to
+the bridge without a socket. For each combination it reports wall time per packet,
+coordinator listener callbacks per packet and state writes per packet. State
+writes read the entity state and attributes like Home Assistant does.
+
+With --reloads it instead sets up and unloads one robot on the simulator
+repeatedly and prints the listeners, tasks and traced memory left after
+each unload, which should stay flat.
+
+Needs Home Assistant installed.
+
+    python benchmarks/bench_dispatch.py --robots 1,4,16 --entities 10,40
+    python benchmarks/bench_dispatch.py --reloads 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import logging
+import random
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any
+
+from common import FakeHass, load_integration
+from simulator import BridgeSimulator
+
+bridge_module = load_integration("bridge")
+coordinator_module = load_integration("coordinator")
+const = load_integration("const")
+vacuum = load_integration("vacuum")
+PLATFORMS = [
+    load_integration(name) for name in ("binary_sensor", "button", "number", "switch")
+]
+
+
+class Counters:
+    """Calls counted during a run."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.callbacks = 0
+        self.writes = 0
+
+
+def make_packets(robots: list[str], count: int, seed: int = 0) -> list[bytes]:
+    """Return status packets cycling through the robots."""
+    rng = random.Random(seed)
+    packets = []
+    for i in range(count):
+        data: dict[str, Any] = {
+            "pos": [rng.randint(-5000, 5000), rng.randint(-5000, 5000)],
+            "phi": round(rng.uniform(-3.14, 3.14), 3),
+            "elec": 100 - i // 1000 % 100,
+        }
+        if i % 20 == 0:
+            data["mode"] = rng.choice(["sweep", "pause", "backcharge"])
+        if i % 50 == 0:
+            data["led"] = rng.randint(0, 1)
+        payload = {
+            "origin": "robot",
+            "sn": robots[i % len(robots)],
+            "robot_connected": True,
+            "cloud_connected": True,
+            "data": {"infoType": 20001, "data": data},
+        }
+        packets.append(json.dumps(payload).encode())
+    return packets
+
+
+async def create_entities(
+    hass: FakeHass, entry: Any, count: int, counters: Counters
+) -> list[Any]:
+    """Create a vacuum and repeat the other platforms until count entities exist."""
+    entities: list[Any] = []
+    await vacuum.async_setup_entry(hass, entry, entities.extend)
+    for platform in itertools.cycle(PLATFORMS):
+        if len(entities) >= count:
+            break
+        await platform.async_setup_entry(hass, entry, entities.extend)
+
+    for entity in entities:
+        entity.hass = hass
+        await entity.async_added_to_hass()
+
+        def write_state(entity: Any = entity) -> None:
+            counters.writes += 1
+            entity.state  # noqa: B018
+            entity.state_attributes  # noqa: B018
+            entity.extra_state_attributes  # noqa: B018
+
+        entity.async_write_ha_state = write_state
+    return entities
+
+
+async def remove_entity(entity: Any) -> None:
+    """Remove an entity the way Home Assistant does, leaving out its states."""
+    entity._call_on_remove_callbacks()
+    await entity.async_will_remove_from_hass()
+
+
+async def run(robot_count: int, entity_count: int, packet_count: int) -> dict:
+    """Return the measurements of one combination."""
+    hass = FakeHass()
+    counters = Counters()
+    bridge = bridge_module.CN360Bridge(hass, "127.0.0.1", 0, "stream", 0)
+    robots = [f"360S9{i:09d}" for i in range(robot_count)]
+
+    entities = 0
+    for i, sn in enumerate(robots):
+        coordinator = coordinator_module.CN360Coordinator(hass, bridge, sn)
+        add_key_listener = coordinator.async_add_key_listener
+
+        def counting_add_key_listener(update_callback, keys=None, add=add_key_listener):
+            def counted() -> None:
+                counters.callbacks += 1
+                update_callback()
+
+            return add(counted, keys)
+
+        coordinator.async_add_key_listener = counting_add_key_listener
+        entry = SimpleNamespace(entry_id=f"entry{i}", data={}, options={})
+        hass.data.setdefault(const.DOMAIN, {})[entry.entry_id] = {
+            "coordinator": coordinator
+        }
+        entities += len(await create_entities(hass, entry, entity_count, counters))
+
+    packets = make_packets(robots, packet_count)
+    # Fill every robot's data once so all runs start from the same state
+    for payload in packets[: robot_count * 2]:
+        bridge._handle_frame(payload)
+    await asyncio.sleep(0)
+    counters.callbacks = counters.writes = 0
+
+    start = time.perf_counter()
+    for payload in packets:
+        bridge._handle_frame(payload)
+        # Let scheduled state writes run, like between socket reads
+        await asyncio.sleep(0)
+    wall = time.perf_counter() - start
+
+    return {
+        "entities": entities // robot_count,
+        "us_per_packet": wall / packet_count * 1e6,
+        "callbacks": counters.callbacks / packet_count,
+        "writes": counters.writes / packet_count,
+    }
+
+
+async def reload(reloads: int, entity_count: int) -> None:
+    """Set up and unload one robot repeatedly, printing what is left alive."""
+    hass = FakeHass()
+    counters = Counters()
+    simulator = BridgeSimulator(robot_rate=200)
+    port = await simulator.start()
+    sn = simulator.robots[0].sn
+    tracemalloc.start()
+
+    print(
+        f"{'reload':>6} {'listeners':>9} {'left':>5} {'tasks':>6} {'KiB':>8}"
+        f" {'callbacks':>10}"
+    )
+    for cycle in range(1, reloads + 1):
+        bridge = bridge_module.async_get_bridge(hass, "127.0.0.1", port, "stream", 1)
+        coordinator = coordinator_module.CN360Coordinator(hass, bridge, sn)
+        entry = SimpleNamespace(entry_id=f"entry{cycle}", data={}, options={})
+        hass.data.setdefault(const.DOMAIN, {})[entry.entry_id] = {
+            "coordinator": coordinator
+        }
+        entities = await create_entities(hass, entry, entity_count, counters)
+        await asyncio.sleep(0.2)
+        listeners = coordinator.getListenerCount()
+
+        for entity in entities:
+            await remove_entity(entity)
+        left = coordinator.getListenerCount()
+        await coordinator.async_disconnect()
+        hass.data[const.DOMAIN].pop(entry.entry_id)
+        del entities, coordinator, bridge
+        callbacks = counters.callbacks
+        # Anything still subscribed would be called by packets arriving now
+        await asyncio.sleep(0.05)
+        gc.collect()
+        print(
+            f"{cycle:>6} {listeners:>9} {left:>5}"
+            f" {len(asyncio.all_tasks()) - 1:>6}"
+            f" {tracemalloc.get_traced_memory()[0] / 1024:>8.0f}"
+            f" {counters.callbacks - callbacks:>10}"
+        )
+
+    tracemalloc.stop()
+    await simulator.close()
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--robots", default="1,2,4,8,16")
+    parser.add_argument("--entities", default="10,20,40,80")
+    parser.add_argument("--packets", type=int, default=5000)
+    parser.add_argument("--reloads", type=int, default=0)
+    args = parser.parse_args()
+    # The bridge is never connected, keep the failed initial requests quiet
+    logging.basicConfig(level=logging.CRITICAL)
+
+    if args.reloads:
+        asyncio.run(reload(args.reloads, int(args.entities.split(",")[-1])))
+        return
+
+    print(
+        f"{'robots':>6} {'entities':>8} {'us/packet':>10}"
+        f" {'callbacks/packet':>17} {'writes/packet':>14}"
+    )
+    for robot_count in (int(n) for n in args.robots.split(",")):
+        for entity_count in (int(n) for n in args.entities.split(",")):
+            result = asyncio.run(run(robot_count, entity_count, args.packets))
+            print(
+                f"{robot_count:>6} {result['entities']:>8}"
+                f" {result['us_per_packet']:>10.1f}"
+                f" {result['callbacks']:>17.2f} {result['writes']:>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark frame decoding of the bridge protocol.
+
+Compares the former readexactly() read loop with protocol.FrameDecoder on a
+recorded-like stream, clean and with injected garbage.
+
+    python benchmarks/bench_frame_decoder.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from common import load_module, make_robot_stream
+
+protocol = load_module("protocol")
+
+
+def corrupt(stream: bytes, every: int, garbage: int, seed: int = 0) -> bytes:
+    """Insert garbage bytes between frames."""
+    rng = random.Random(seed)
+    decoder = protocol.FrameDecoder()
+    out = []
+    for i, payload in enumerate(decoder.feed(stream)):
+        if i % every == 0:
+            out.append(bytes(rng.randrange(256) for _ in range(garbage)))
+        out.append(protocol.encode_frame(payload))
+    return b"".join(out)
+
+
+async def legacy_read(stream: bytes) -> tuple[int, int]:
+    """Read frames like the former coordinator loop, return frames and awaits."""
+    reader = asyncio.StreamReader()
+    reader.feed_data(stream)
+    reader.feed_eof()
+    frames = awaits = 0
+    try:
+        while True:
+            header = await reader.readexactly(2)
+            awaits += 1
+            if header == b"\x16\x16":
+                length = int.from_bytes(await reader.readexactly(2), "big")
+                await reader.readexactly(length)
+                awaits += 2
+                frames += 1
+            else:
+                await reader.read(1)
+                awaits += 1
+    except asyncio.IncompleteReadError:
+        pass
+    return frames, awaits
+
+
+async def decoder_read(stream: bytes, chunk: int) -> tuple[int, int]:
+    """Read frames with FrameDecoder, return frames and awaits."""
+    reader = asyncio.StreamReader(limit=2**20)
+    reader.feed_data(stream)
+    reader.feed_eof()
+    decoder = protocol.FrameDecoder()
+    frames = awaits = 0
+    while data := await reader.read(chunk):
+        awaits += 1
+        frames += len(decoder.feed(data))
+    return frames, awaits
+
+
+def measure(label: str, coro_factory, expected: int) -> None:
+    """Run one variant and print its cost."""
+    start = time.perf_counter()
+    cpu = time.process_time()
+    frames, awaits = asyncio.run(coro_factory())
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - start
+    print(
+        f"{label:<28} {frames:>7}/{expected:<7} {awaits:>8}"
+        f" {wall * 1000:>9.1f} {cpu / max(frames, 1) * 1e6:>9.2f}"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--chunk", type=int, default=1460, help="bytes per read")
+    args = parser.parse_args()
+
+    clean, count = make_robot_stream(args.frames)
+    dirty = corrupt(clean, every=10, garbage=7)
+
+    print(
+        f"{'variant':<28} {'frames':>15} {'awaits':>8} {'wall ms':>9} {'cpu us/f':>9}"
+    )
+    for name, stream in (("clean", clean), ("garbage", dirty)):
+        measure(f"{name}: readexactly", lambda s=stream: legacy_read(s), count)
+        measure(
+            f"{name}: decoder",
+            lambda s=stream: decoder_read(s, args.chunk),
+            count,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark the map geometry transform.
+
+Compares the pure Python bounds/scale/centroid loops the map used to run
+with the packed NumPy arrays of map_render.MapGeometry.
+
+    python benchmarks/bench_map_geometry.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+
+from common import load_module, make_smart_area
+
+map_render = load_module("map_render")
+MAP_HEIGHT = map_render.MAP_HEIGHT
+MAP_MARGIN = map_render.MAP_MARGIN
+MAP_WIDTH = map_render.MAP_WIDTH
+
+CASES = [(1, 8), (10, 32), (50, 100), (200, 200), (500, 400)]
+
+
+def python_geometry(areas):
+    """Return pixels and centers using the former pure Python loops."""
+    all_vertices = []
+    for area in areas:
+        all_vertices.extend(area.get("vertexs", []))
+
+    min_x = min(point[0] for point in all_vertices) - MAP_MARGIN
+    max_x = max(point[0] for point in all_vertices) + MAP_MARGIN
+    min_y = min(point[1] for point in all_vertices) - MAP_MARGIN
+    max_y = max(point[1] for point in all_vertices) + MAP_MARGIN
+    scale = min(
+        (MAP_WIDTH - 2 * MAP_MARGIN) / ((max_x - min_x) or 1),
+        (MAP_HEIGHT - 2 * MAP_MARGIN) / ((max_y - min_y) or 1),
+    )
+
+    result = []
+    for area in areas:
+        scaled_vertices = []
+        for x, y in area.get("vertexs", []):
+            scaled_x = (x - min_x) * scale + MAP_MARGIN
+            scaled_y = MAP_HEIGHT - ((y - min_y) * scale + MAP_MARGIN)
+            scaled_vertices.append((scaled_x, scaled_y))
+        center_x = sum(v[0] for v in scaled_vertices) / len(scaled_vertices)
+        center_y = sum(v[1] for v in scaled_vertices) / len(scaled_vertices)
+        result.append((scaled_vertices, (center_x, center_y)))
+    return result
+
+
+def numpy_geometry(areas):
+    """Return pixels and centers using MapGeometry."""
+    geometry = map_render.MapGeometry.from_areas(areas)
+    transform = geometry.compute_transform()
+    pixels = geometry.to_pixels(transform)
+    return pixels, geometry.centroids(pixels)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'rooms':>6} {'vertices':>9} {'python ms':>10} {'numpy ms':>9} {'speedup':>8}"
+    )
+    for rooms, per_room in CASES:
+        areas = make_smart_area(rooms, per_room)["value"]
+        number = max(1, 20000 // (rooms * per_room))
+        python_time = (
+            min(
+                timeit.repeat(
+                    lambda areas=areas: python_geometry(areas),
+                    number=number,
+                    repeat=args.repeat,
+                )
+            )
+            / number
+        )
+        numpy_time = (
+            min(
+                timeit.repeat(
+                    lambda areas=areas: numpy_geometry(areas),
+                    number=number,
+                    repeat=args.repeat,
+                )
+            )
+            / number
+        )
+        print(
+            f"{rooms:>6} {rooms * per_room:>9} {python_time * 1000:>10.3f}"
+            f" {numpy_time * 1000:>9.3f} {python_time / numpy_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
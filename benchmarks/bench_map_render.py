@@ -0,0 +1,205 @@
+"""Benchmark map rendering across map sizes and PNG encoder settings.
+
+For synthetic smartArea payloads from one to hundreds of rooms it measures
+rasterizing the room layer, drawing it again after one room changed (reusing
+the tiles of the other rooms), drawing the markers of one frame on the cached
+layer, encoding the frame with each encoder, the peak Python memory of a
+cold render (tracemalloc, Pillow's image buffers are not included) and the
+PNG size.
+
+Results are compared with a JSON baseline, --save writes a new one:
+
+    python benchmarks/bench_map_render.py
+    python benchmarks/bench_map_render.py --save
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+from pathlib import Path
+import platform
+import timeit
+import tracemalloc
+from typing import Any
+
+import numpy as np
+from PIL import Image
+import PIL
+
+from common import load_module, make_smart_area
+
+map_render = load_module("map_render")
+
+BASELINE = Path(__file__).parent / "baselines" / "map_render.json"
+
+# (rooms, vertices per room)
+CASES = [(1, 8), (5, 32), (20, 64), (50, 100), (100, 100), (300, 50), (500, 40)]
+
+# PNG settings compared, "png" is what the integration uses
+ENCODERS: dict[str, dict[str, Any]] = {
+    "png": {},
+    "png-fast": {"compress_level": 1},
+    "png-optimize": {"optimize": True},
+}
+
+# Columns compared with the baseline
+TIMINGS = ("base_ms", "room_ms", "frame_ms")
+
+
+def encode(img: Image.Image, params: dict[str, Any]) -> bytes:
+    """Encode an image as PNG with the given settings."""
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", **params)
+    return buffer.getvalue()
+
+
+def best_time(func, repeat: int, budget: float = 0.2) -> float:
+    """Return the best time per call in milliseconds."""
+    timer = timeit.Timer(func)
+    once = timer.timeit(1)
+    number = max(1, int(budget / max(once, 1e-6) / repeat))
+    return round(min(timer.repeat(repeat=repeat, number=number)) / number * 1000, 3)
+
+
+def measure(rooms: int, per_room: int, repeat: int) -> dict[str, Any]:
+    """Return the measurements of one map size."""
+    smart_area = make_smart_area(rooms, per_room)
+    areas = smart_area["value"]
+    active_ids = smart_area["activeIds"]
+    pos = areas[0]["vertexs"][0]
+    charger_pos = areas[-1]["vertexs"][0]
+
+    def draw_base() -> tuple[Image.Image, Any]:
+        base = Image.new(
+            "RGBA",
+            (map_render.MAP_WIDTH, map_render.MAP_HEIGHT),
+            map_render.BACKGROUND_COLOR,
+        )
+        geometry = map_render.MapGeometry.from_areas(areas)
+        transform = geometry.compute_transform()
+        map_render.draw_rooms(base, geometry, active_ids, transform)
+        return base, transform
+
+    base, transform = draw_base()
+
+    # Shrink one room towards its center, the map bounds stay the same
+    room = areas[len(areas) // 2]
+    cx, cy = (sum(v) / len(v) for v in zip(*room["vertexs"]))
+    changed_areas = list(areas)
+    changed_areas[len(areas) // 2] = {
+        **room,
+        "vertexs": [
+            [cx + (x - cx) * 0.9, cy + (y - cy) * 0.9] for x, y in room["vertexs"]
+        ],
+    }
+    tiles = map_render.draw_rooms(
+        base.copy(), map_render.MapGeometry.from_areas(areas), active_ids, transform
+    )
+
+    def draw_room_change() -> Image.Image:
+        layer = Image.new(
+            "RGBA",
+            (map_render.MAP_WIDTH, map_render.MAP_HEIGHT),
+            map_render.BACKGROUND_COLOR,
+        )
+        geometry = map_render.MapGeometry.from_areas(changed_areas)
+        map_render.draw_rooms(layer, geometry, active_ids, transform, tiles)
+        return layer
+
+    def draw_frame() -> Image.Image:
+        frame = base.copy()
+        map_render.draw_markers(frame, transform, pos, charger_pos, 0.5)
+        return frame
+
+    frame = draw_frame()
+
+    # Load fonts and other module level state before tracing
+    map_render.MapRenderer().render(smart_area, pos, charger_pos, 0.5)
+    tracemalloc.start()
+    map_render.MapRenderer().render(smart_area, pos, charger_pos, 0.5)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rooms": rooms,
+        "vertices": rooms * per_room,
+        "base_ms": best_time(draw_base, repeat),
+        "room_ms": best_time(draw_room_change, repeat),
+        "frame_ms": best_time(draw_frame, repeat),
+        "encode_ms": {
+            name: best_time(lambda p=params: encode(frame, p), repeat)
+            for name, params in ENCODERS.items()
+        },
+        "size": {name: len(encode(frame, params)) for name, params in ENCODERS.items()},
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def environment() -> dict[str, str]:
+    """Return the versions the results depend on."""
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "pillow": PIL.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def delta(value: float, baseline: dict[str, Any] | None, key: str) -> str:
+    """Return the change against the baseline in percent."""
+    if baseline is None or not baseline.get(key):
+        return ""
+    return f"{(value / baseline[key] - 1) * 100:+.0f}%"
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the baseline")
+    args = parser.parse_args()
+
+    baseline: dict[tuple[int, int], dict[str, Any]] = {}
+    if args.baseline.exists() and not args.save:
+        for case in json.loads(args.baseline.read_text())["cases"]:
+            baseline[(case["rooms"], case["vertices"])] = case
+
+    encoders = " ".join(f"{name + ' ms':>16}" for name in ENCODERS)
+    print(
+        f"{'rooms':>6} {'vertices':>9} {'base ms':>14} {'room ms':>14}"
+        f" {'frame ms':>14}"
+        f" {encoders} {'png KiB':>8} {'peak KiB':>9}"
+    )
+    results = []
+    for rooms, per_room in CASES:
+        result = measure(rooms, per_room, args.repeat)
+        results.append(result)
+        previous = baseline.get((rooms, result["vertices"]))
+        timings = " ".join(
+            f"{result[key]:>8.2f} {delta(result[key], previous, key):>5}"
+            for key in TIMINGS
+        )
+        encode_times = " ".join(
+            f"{ms:>10.2f} {delta(ms, previous and previous['encode_ms'], name):>5}"
+            for name, ms in result["encode_ms"].items()
+        )
+        print(
+            f"{rooms:>6} {result['vertices']:>9} {timings} {encode_times}"
+            f" {result['size']['png'] / 1024:>8.1f} {result['peak_kib']:>9.0f}"
+        )
+
+    if args.save:
+        args.baseline.parent.mkdir(exist_ok=True)
+        args.baseline.write_text(
+            json.dumps({"environment": environment(), "cases": results}, indent=2)
+            + "\n"
+        )
+        print(f"Baseline written to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
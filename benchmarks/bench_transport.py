@@ -0,0 +1,110 @@
+"""Benchmark the stream and protocol transports of the coordinator.
+
+A server process replays a recorded-like packet stream over localhost, the
+client reads it with the StreamReader based loop or with
+protocol.FrameProtocol. Frames are decoded as JSON in both cases, like the
+coordinator does.
+
+    python benchmarks/bench_transport.py --frames 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+
+from common import load_module, make_robot_stream
+
+protocol = load_module("protocol")
+
+READ_CHUNK_SIZE = 65536
+
+
+def serve(port_queue: multiprocessing.Queue, stream: bytes) -> None:
+    """Send the stream to each client, then close the connection."""
+
+    async def handle(_reader, writer) -> None:
+        writer.write(stream)
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    async def main() -> None:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port_queue.put(server.sockets[0].getsockname()[1])
+        async with server:
+            await asyncio.sleep(3600)
+
+    asyncio.run(main())
+
+
+async def read_stream(port: int) -> int:
+    """Read frames with StreamReader and FrameDecoder."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    decoder = protocol.FrameDecoder()
+    frames = 0
+    while data := await reader.read(READ_CHUNK_SIZE):
+        for payload in decoder.feed(data):
+            json.loads(payload)
+            frames += 1
+    writer.close()
+    return frames
+
+
+async def read_protocol(port: int) -> int:
+    """Read frames with FrameProtocol."""
+    frames = 0
+
+    def on_frame(payload: bytes) -> None:
+        nonlocal frames
+        json.loads(payload)
+        frames += 1
+
+    loop = asyncio.get_running_loop()
+    _, conn = await loop.create_connection(
+        lambda: protocol.FrameProtocol(on_frame), "127.0.0.1", port
+    )
+    await conn.wait_closed()
+    return frames
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    stream, count = make_robot_stream(args.frames)
+    port_queue: multiprocessing.Queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=serve, args=(port_queue, stream), daemon=True
+    )
+    server.start()
+    port = port_queue.get()
+
+    print(f"{count} frames, {len(stream) / 1e6:.1f} MB per round")
+    print(f"{'transport':<10} {'packets/s':>12} {'cpu us/packet':>14}")
+    try:
+        for name, reader in (("stream", read_stream), ("protocol", read_protocol)):
+            best_rate = best_cpu = 0.0
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                cpu = time.process_time()
+                frames = asyncio.run(reader(port))
+                cpu = time.process_time() - cpu
+                wall = time.perf_counter() - start
+                assert frames == count, f"{name} read {frames} of {count} frames"
+                rate = frames / wall
+                if rate > best_rate:
+                    best_rate, best_cpu = rate, cpu / frames
+            print(f"{name:<10} {best_rate:>12,.0f} {best_cpu * 1e6:>14.2f}")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
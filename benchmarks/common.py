@@ -0,0 +1,133 @@
+"""Helpers shared by the benchmarks."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+from collections.abc import Coroutine
+import importlib
+import importlib.util
+import json
+import math
+from pathlib import Path
+import random
+import sys
+from types import ModuleType
+from typing import Any
+
+REPO_DIR = Path(__file__).parent.parent
+COMPONENT_DIR = REPO_DIR / "custom_components" / "cn360"
+
+
+def load_module(name: str) -> ModuleType:
+    """Load a standalone module of the integration without Home Assistant."""
+    if module := sys.modules.get(f"cn360_{name}"):
+        return module
+    spec = importlib.util.spec_from_file_location(
+        f"cn360_{name}", COMPONENT_DIR / f"{name}.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_integration(name: str) -> ModuleType:
+    """Import a module of the integration package, needs Home Assistant."""
+    if str(REPO_DIR) not in sys.path:
+        sys.path.insert(0, str(REPO_DIR))
+    return importlib.import_module(f"custom_components.cn360.{name}")
+
+
+class FakeHass:
+    """The parts of HomeAssistant the coordinator and entities use.
+
+    Jobs run directly on the event loop, without Home Assistant's task
+    tracking, so measurements only contain the integration's own cost.
+    """
+
+    def __init__(self) -> None:
+        """Initialize on the running loop."""
+        self.loop = asyncio.get_running_loop()
+        self.data: dict[str, Any] = {}
+
+    def async_create_background_task(
+        self, target: Coroutine[Any, Any, Any], name: str, eager_start: bool = True
+    ) -> asyncio.Task[Any]:
+        """Run a coroutine as a task."""
+        return self.loop.create_task(target, name=name)
+
+    def async_create_task(
+        self, target: Coroutine[Any, Any, Any], name: str | None = None
+    ) -> asyncio.Task[Any]:
+        """Run a coroutine as a task."""
+        return self.loop.create_task(target, name=name)
+
+    def async_add_executor_job(self, target: Any, *args: Any) -> asyncio.Future[Any]:
+        """Run a function in the default executor."""
+        return self.loop.run_in_executor(None, target, *args)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return the value below which the given fraction of values falls."""
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def make_smart_area(
+    rooms: int, vertices_per_room: int, seed: int = 0
+) -> dict[str, Any]:
+    """Return a synthetic smartArea payload with rooms on a grid."""
+    rng = random.Random(seed)
+    columns = max(1, math.ceil(math.sqrt(rooms)))
+    areas = []
+    for room in range(rooms):
+        center_x = (room % columns) * 5000
+        center_y = (room // columns) * 5000
+        points = []
+        for k in range(vertices_per_room):
+            angle = 2 * math.pi * k / vertices_per_room
+            radius = 2000 + rng.uniform(-200, 200)
+            points.append(
+                [
+                    round(center_x + radius * math.cos(angle), 1),
+                    round(center_y + radius * math.sin(angle), 1),
+                ]
+            )
+        areas.append(
+            {
+                "id": room,
+                "name": base64.b64encode(f"Room {room}".encode()).decode(),
+                "vertexs": points,
+            }
+        )
+    return {"value": areas, "activeIds": list(range(0, rooms, 3))}
+
+
+def make_robot_stream(frames: int, seed: int = 0) -> tuple[bytes, int]:
+    """Return a stream of status frames with a map every 50 frames."""
+    protocol = load_module("protocol")
+    rng = random.Random(seed)
+    smart_area = make_smart_area(12, 40, seed)
+    chunks = []
+    for i in range(frames):
+        if i % 50 == 0:
+            data = {"smartArea": smart_area}
+        else:
+            data = {
+                "pos": [rng.randint(-5000, 5000), rng.randint(-5000, 5000)],
+                "phi": rng.uniform(-3.14, 3.14),
+                "elec": rng.randint(0, 100),
+                "mode": "sweep",
+            }
+        payload = {
+            "origin": "robot",
+            "sn": "360S9000000001",
+            "robot_connected": True,
+            "cloud_connected": True,
+            "data": {"infoType": 20001, "data": data},
+        }
+        chunks.append(protocol.encode_frame(json.dumps(payload).encode()))
+    return b"".join(chunks), frames
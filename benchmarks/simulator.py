@@ -0,0 +1,338 @@
+"""Simulated CN360 bridge.
+
+Speaks the bridge framing and sends robot, local and server packets at
+configurable rates. Commands are answered like the robot answers them, the
+requests of the coordinator's initial data refresh get a full status and
+map. A packet trace from the diagnostics download can be replayed instead of
+or in addition to the generated packets.
+
+Run it standalone to point Home Assistant at it:
+
+    python benchmarks/simulator.py --port 4468 --robots 2 --rate 5
+    python benchmarks/simulator.py --replay config_entry-cn360-xxx.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+import json
+from pathlib import Path
+import random
+import time
+from typing import Any
+
+from common import load_module, make_smart_area
+
+protocol = load_module("protocol")
+
+# Setting commands (infoType 21024) and the data key they change
+SETTINGS = {
+    "setledswitch": "led",
+    "setSoftAlongWall": "soft",
+    "setAutoBoost": "autoBoost",
+    "setVolume": "vol",
+}
+
+# Commands answered with the map, everything else is answered with the status
+MAP_COMMANDS = {21011, 21019}
+
+# Packets sent per tick at high rates
+TICK = 0.001  # seconds
+
+_json_decoder = json.JSONDecoder()
+
+
+@dataclass
+class SimulatedRobot:
+    """State of one simulated robot."""
+
+    sn: str
+    rng: random.Random
+    status: dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        """Start docked and fully charged."""
+        self.status = {
+            "mode": "charge",
+            "elec": 100,
+            "pos": [0, 0],
+            "phi": 0.0,
+            "chargeHandlePos": [0, 0],
+            "workNoisy": "auto",
+            "led": 1,
+            "soft": 0,
+            "autoBoost": 0,
+            "vol": 5,
+            "errorState": [0],
+        }
+
+    def step(self) -> dict[str, Any]:
+        """Move the robot and return the changed status values."""
+        x, y = self.status["pos"]
+        update = {
+            "pos": [x + self.rng.randint(-100, 100), y + self.rng.randint(-100, 100)],
+            "phi": round(self.rng.uniform(-3.14, 3.14), 3),
+            "elec": max(0, self.status["elec"] - (self.rng.random() < 0.01)),
+        }
+        self.status.update(update)
+        return update
+
+
+class BridgeSimulator:
+    """asyncio server standing in for the CN360 bridge."""
+
+    def __init__(
+        self,
+        robots: int = 1,
+        robot_rate: float = 1.0,
+        server_rate: float = 0.0,
+        map_every: int = 0,
+        timestamps: bool = False,
+        trace: list[dict[str, Any]] | None = None,
+        trace_speed: float = 1.0,
+        seed: int = 0,
+    ) -> None:
+        """Initialize the simulator.
+
+        Every robot sends robot_rate status packets per second and the server
+        server_rate packets per second, a map is sent with every map_every-th
+        status packet. With timestamps, status packets carry the monotonic
+        send time as benchSent.
+        """
+        rng = random.Random(seed)
+        self.robots = [
+            SimulatedRobot(f"360S9{i:09d}", random.Random(rng.random()))
+            for i in range(robots)
+        ]
+        self.robot_rate = robot_rate
+        self.server_rate = server_rate
+        self.map_every = map_every
+        self.timestamps = timestamps
+        self.trace = trace or []
+        self.trace_speed = trace_speed
+        self.smart_area = make_smart_area(8, 24, seed)
+
+        self.sent = 0
+        self.commands: dict[int, int] = {}
+        self._server: asyncio.Server | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start listening and return the port."""
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stop listening."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve one connection until it is closed."""
+        for robot in self.robots:
+            self._send(writer, {"origin": "local", "sn": robot.sn, "connected": True})
+        tasks = [asyncio.create_task(self._read_commands(reader, writer))]
+        if self.robot_rate:
+            tasks.append(asyncio.create_task(self._emit_robots(writer)))
+        if self.server_rate:
+            tasks.append(asyncio.create_task(self._emit_server(writer)))
+        if self.trace:
+            tasks.append(asyncio.create_task(self._replay(writer)))
+        try:
+            await tasks[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    def _send(self, writer: asyncio.StreamWriter, payload: dict[str, Any]) -> None:
+        """Send one framed packet."""
+        writer.write(protocol.encode_frame(json.dumps(payload).encode()))
+        self.sent += 1
+
+    def _robot_packet(
+        self,
+        robot: SimulatedRobot,
+        data: dict[str, Any],
+        info_type: int = 20001,
+        errno: int | None = None,
+    ) -> dict[str, Any]:
+        """Return a robot packet."""
+        inner: dict[str, Any] = {"infoType": info_type, "data": data}
+        if errno is not None:
+            inner["errno"] = errno
+        return {
+            "origin": "robot",
+            "sn": robot.sn,
+            "robot_connected": True,
+            "cloud_connected": True,
+            "data": inner,
+        }
+
+    async def _emit_robots(self, writer: asyncio.StreamWriter) -> None:
+        """Send status packets of every robot at robot_rate."""
+        sequence = 0
+        async for count in _ticks(self.robot_rate):
+            if writer.is_closing():
+                return
+            for _ in range(count):
+                sequence += 1
+                for robot in self.robots:
+                    data = robot.step()
+                    if self.map_every and sequence % self.map_every == 0:
+                        data["smartArea"] = self.smart_area
+                    if self.timestamps:
+                        data["benchSent"] = time.monotonic()
+                    self._send(writer, self._robot_packet(robot, data))
+            await writer.drain()
+
+    async def _emit_server(self, writer: asyncio.StreamWriter) -> None:
+        """Send server packets at server_rate."""
+        async for count in _ticks(self.server_rate):
+            if writer.is_closing():
+                return
+            for _ in range(count):
+                for robot in self.robots:
+                    self._send(
+                        writer,
+                        {
+                            "origin": "server",
+                            "sn": robot.sn,
+                            "data": {"infoType": 20002, "data": {}},
+                        },
+                    )
+            await writer.drain()
+
+    async def _read_commands(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer commands, which are sent as unframed JSON objects."""
+        buffer = ""
+        while data := await reader.read(65536):
+            buffer += data.decode()
+            while buffer:
+                try:
+                    command, end = _json_decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    break
+                buffer = buffer[end:].lstrip()
+                self._answer(writer, command)
+            await writer.drain()
+
+    def _answer(self, writer: asyncio.StreamWriter, command: dict[str, Any]) -> None:
+        """Answer one command of a robot."""
+        info_type = int(command.get("infoType", 0))
+        self.commands[info_type] = self.commands.get(info_type, 0) + 1
+        robot = next((r for r in self.robots if r.sn == command.get("sn")), None)
+        if robot is None:
+            return
+
+        data = command.get("data") or {}
+        if info_type == 21024 and (key := SETTINGS.get(data.get("cmd"))):
+            robot.status[key] = data.get("value")
+            answer = {key: robot.status[key]}
+        elif info_type == 21022:
+            robot.status["workNoisy"] = data.get("cmd")
+            answer = {"workNoisy": robot.status["workNoisy"]}
+        elif info_type in MAP_COMMANDS:
+            answer = {"smartArea": self.smart_area}
+        else:
+            answer = dict(robot.status)
+        self._send(writer, self._robot_packet(robot, answer, info_type, errno=0))
+
+    async def _replay(self, writer: asyncio.StreamWriter) -> None:
+        """Send the received frames of the trace with their original timing."""
+        entries = [
+            entry
+            for entry in self.trace
+            if entry.get("direction") == "rx" and entry.get("payload")
+        ]
+        if not entries:
+            return
+        start = _timestamp(entries[0])
+        loop = asyncio.get_running_loop()
+        replay_start = loop.time()
+        for entry in entries:
+            delay = (_timestamp(entry) - start) / self.trace_speed
+            await asyncio.sleep(max(0, replay_start + delay - loop.time()))
+            payload = dict(entry["payload"])
+            # Serial numbers are redacted in the download
+            if payload.get("sn") == "**REDACTED**":
+                payload["sn"] = self.robots[0].sn
+            self._send(writer, payload)
+            await writer.drain()
+
+
+async def _ticks(rate: float):
+    """Yield the number of packets due, keeping the rate without drift."""
+    loop = asyncio.get_running_loop()
+    interval = 1 / rate
+    start = loop.time()
+    sent = 0
+    while True:
+        due = int((loop.time() - start) / interval) + 1
+        if due > sent:
+            yield due - sent
+            sent = due
+        await asyncio.sleep(max(TICK, start + sent * interval - loop.time()))
+
+
+def _timestamp(entry: dict[str, Any]) -> float:
+    """Return the time of a trace entry in seconds."""
+    return datetime.fromisoformat(entry["time"]).timestamp()
+
+
+def load_trace(path: Path) -> list[dict[str, Any]]:
+    """Load the packet trace of a diagnostics download."""
+    diagnostics = json.loads(path.read_text())
+    # Downloads wrap the integration's diagnostics in "data"
+    return diagnostics.get("data", diagnostics).get("trace", [])
+
+
+async def serve(args: argparse.Namespace) -> None:
+    """Run the simulator until interrupted."""
+    simulator = BridgeSimulator(
+        robots=args.robots,
+        robot_rate=args.rate,
+        server_rate=args.server_rate,
+        map_every=args.map_every,
+        trace=load_trace(args.replay) if args.replay else None,
+        trace_speed=args.speed,
+    )
+    port = await simulator.start(args.host, args.port)
+    print(f"Simulating {args.robots} robot(s) on {args.host}:{port}")
+    for robot in simulator.robots:
+        print(f"  {robot.sn}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.close()
+
+
+def main() -> None:
+    """Parse arguments and run the simulator."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4468)
+    parser.add_argument("--robots", type=int, default=1)
+    parser.add_argument(
+        "--rate", type=float, default=1.0, help="status packets/s per robot"
+    )
+    parser.add_argument("--server-rate", type=float, default=0.0)
+    parser.add_argument("--map-every", type=int, default=30)
+    parser.add_argument("--replay", type=Path, help="diagnostics download")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
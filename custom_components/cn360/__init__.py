@@ -2,14 +2,15 @@
 
 from __future__ import annotations
 
-import asyncio
 import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.storage import Store
 
-from .const import DOMAIN
+from .const import DOMAIN, IDENTIFY_TIMEOUT, STORAGE_VERSION
 from .coordinator import CN360Coordinator, async_setup_coordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -27,25 +28,30 @@ PLATFORMS = [
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up 360 Robot from a config entry."""
     coordinator: CN360Coordinator = await async_setup_coordinator(hass, entry)
+
+    # Entities are identified by the serial number, wait until it is known
+    try:
+        await coordinator.async_wait_identified(IDENTIFY_TIMEOUT)
+    except TimeoutError as err:
+        await coordinator.async_disconnect()
+        raise ConfigEntryNotReady(
+            f"Robot did not report to the CN360 server within {IDENTIFY_TIMEOUT} s"
+        ) from err
+
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         "coordinator": coordinator,
     }
 
-    entry.async_create_task(hass, setup_enties(hass, entry, coordinator))
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     return True
 
 
-async def setup_enties(
-    hass: HomeAssistant, entry: ConfigEntry, coordinator: CN360Coordinator
-):
-    """Wait for serial number before adding platforms."""
-    while not coordinator.getSerialNumber():
-        await asyncio.sleep(1)
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-
-    await coordinator.async_update_listeners()
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -55,10 +61,15 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Disconnect from robot socket
     if unload_ok and entry.entry_id in hass.data.get(DOMAIN, {}):
         coordinator: CN360Coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-        hass.async_add_executor_job(coordinator.disconnect)
+        await coordinator.async_disconnect()
 
         hass.data[DOMAIN].pop(entry.entry_id)
         if not hass.data[DOMAIN]:
             hass.data.pop(DOMAIN)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted robot state of a deleted entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
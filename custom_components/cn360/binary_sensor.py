@@ -11,7 +11,12 @@ from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
-from .const import ERROR_NO_DUSTBIN, ERROR_NO_WATERTANK
+from .const import (
+    ERROR_NO_DUSTBIN,
+    ERROR_NO_WATERTANK,
+    KEY_CLOUD_CONNECTED,
+    KEY_ROBOT_CONNECTED,
+)
 from .entity import CN360BaseEntity, CN360Coordinator
 
 
@@ -27,6 +32,7 @@ async def async_setup_entry(
             hass,
             entry,
             lambda coordinator: (bool(coordinator.getRobotData().get("mopStatus", 0))),
+            ("mopStatus",),
             "Mop installed",
             "mop",
         ),
@@ -36,6 +42,7 @@ async def async_setup_entry(
             lambda coordinator: (
                 ERROR_NO_DUSTBIN not in coordinator.getRobotData().get("errorState", [])
             ),
+            ("errorState",),
             "Dust bin installed",
             "dust_bin_installed",
         ),
@@ -46,6 +53,7 @@ async def async_setup_entry(
                 ERROR_NO_WATERTANK
                 not in coordinator.getRobotData().get("errorState", [])
             ),
+            ("errorState",),
             "Water tank installed",
             "water_tank_installed",
         ),
@@ -53,6 +61,7 @@ async def async_setup_entry(
             hass,
             entry,
             lambda coordinator: (coordinator.isRobotConnected()),
+            (KEY_ROBOT_CONNECTED,),
             "Robot connected",
             "robot_connected",
             dev_class=BinarySensorDeviceClass.CONNECTIVITY,
@@ -62,6 +71,7 @@ async def async_setup_entry(
             hass,
             entry,
             lambda coordinator: (coordinator.isCloudConnected()),
+            (KEY_CLOUD_CONNECTED,),
             "Cloud connected",
             "cloud_connected",
             dev_class=BinarySensorDeviceClass.CONNECTIVITY,
@@ -80,13 +90,14 @@ class CN360BaseBinarySensor(CN360BaseEntity, BinarySensorEntity):
         hass: HomeAssistant,
         entry: ConfigEntry,
         getter: Callable[[CN360Coordinator], bool],
+        keys: tuple[str, ...],
         name: str,
         uid: str,
         dev_class: BinarySensorDeviceClass = None,
         category: EntityCategory = None,
     ) -> None:
         """Init function."""
-        super().__init__(hass, entry)
+        super().__init__(hass, entry, keys)
         self._attr_name = name
         self._attr_unique_id = f"{self._coordinator.getSerialNumber()}_{uid}"
         self._attr_device_class = dev_class
@@ -0,0 +1,516 @@
+"""Shared connection to a CN360 bridge."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import itertools
+import logging
+import random
+import socket
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import (
+    COMMAND_QUEUE_SIZE,
+    CONF_SERIAL,
+    DOMAIN,
+    KEEPALIVE_COUNT,
+    KEEPALIVE_IDLE,
+    KEEPALIVE_INTERVAL,
+    PRIORITY_REFRESH,
+    PROBE_COMMAND,
+    READ_IDLE_TIMEOUT,
+    READ_PROBE_TIMEOUT,
+    RECONNECT_DELAY_MAX,
+    RECONNECT_DELAY_MIN,
+    TRACE_MAX_PAYLOAD,
+    TRACE_SIZE,
+    TRANSPORT_PROTOCOL,
+)
+from .models import TraceEntry
+from .protocol import FrameDecoder, FrameProtocol, decode_message, encode_command
+
+if TYPE_CHECKING:
+    from .coordinator import CN360Coordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bridges shared by the config entries, by (ip, port)
+DATA_BRIDGES = f"{DOMAIN}_bridges"
+
+# Bytes requested per socket read
+READ_CHUNK_SIZE = 65536
+
+
+class CN360Bridge:
+    """Connection to a CN360 bridge shared by the robots behind it.
+
+    Frames are routed to the robot coordinators by the sn they carry.
+    Coordinators without a serial number claim the first unclaimed sn.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        ip: str,
+        port: int,
+        transport: str,
+        trace_sampling: int,
+    ) -> None:
+        """Initialize the bridge, call async_start to connect.
+
+        Every trace_sampling-th received frame is traced, 0 disables tracing.
+        """
+        self.hass = hass
+        self._ip = ip
+        self._port = port
+        self._transport = transport
+
+        # Recent frames for diagnostics
+        self._trace: deque[TraceEntry] = deque(maxlen=TRACE_SIZE)
+        self._trace_sampling = trace_sampling
+
+        # Robots by sn, and robots still waiting to claim one
+        self._robots: dict[str, CN360Coordinator] = {}
+        self._unbound: list[CN360Coordinator] = []
+
+        # TCP writer for sending commands, fed by the writer task
+        self._writer: asyncio.StreamWriter | FrameProtocol | None = None
+        self._writer_task: asyncio.Task[None] | None = None
+        # Queued commands with the future telling their sender if written
+        self._command_queue: asyncio.PriorityQueue[
+            tuple[int, int, bytes, asyncio.Future[bool]]
+        ] = asyncio.PriorityQueue(COMMAND_QUEUE_SIZE)
+        self._command_seq = itertools.count()
+
+        # Connection supervision
+        self._run_task: asyncio.Task[None] | None = None
+        self._watchdog_task: asyncio.Task[None] | None = None
+        self._frame_count = 0
+        self._last_receive = 0.0
+        self._disconnected_at: float | None = None
+        self._reconnect_count = 0
+        self._reconnect_time: float | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start maintaining the connection."""
+        self._run_task = self.hass.async_create_background_task(
+            self._run(), f"CN360-TCP-Task {self._ip}:{self._port}"
+        )
+
+    @callback
+    def async_add_robot(self, robot: CN360Coordinator) -> CALLBACK_TYPE:
+        """Route frames to a robot until the returned callback is called.
+
+        Raises ValueError if another robot already uses its sn.
+        """
+        if (sn := robot.getSerialNumber()) is not None:
+            if sn in self._robots:
+                raise ValueError(f"Robot {sn} is already set up")
+            self._robots[sn] = robot
+        else:
+            self._unbound.append(robot)
+        if self.isConnected():
+            robot.async_set_bridge_connected(True)
+
+        @callback
+        def remove_robot() -> None:
+            """Stop routing frames to the robot."""
+            if robot in self._unbound:
+                self._unbound.remove(robot)
+            for sn, bound in tuple(self._robots.items()):
+                if bound is robot:
+                    del self._robots[sn]
+
+        return remove_robot
+
+    def hasRobots(self) -> bool:
+        """Return True if any robot is set up on the bridge."""
+        return bool(self._robots or self._unbound)
+
+    async def _run(self) -> None:
+        """Maintain TCP connection and dispatch received frames.
+
+        The first retry after losing a working connection is immediate,
+        further retries back off exponentially with jitter.
+        """
+        attempt = 0
+        while True:
+            frames = self._frame_count
+            try:
+                _LOGGER.info(
+                    "Connecting to CN360 server at %s:%d", self._ip, self._port
+                )
+                if self._transport == TRANSPORT_PROTOCOL:
+                    await self._run_protocol()
+                else:
+                    await self._run_stream()
+
+            except (asyncio.IncompleteReadError, OSError):
+                _LOGGER.error("Connection lost to CN360 server, retrying")
+            except Exception:
+                _LOGGER.exception("Error in CN360 bridge loop")
+
+            # Clean up writer state
+            self._set_disconnected()
+
+            # Retry after delay
+            if self._frame_count != frames:
+                attempt = 0
+            delay = _reconnect_delay(attempt)
+            attempt += 1
+            if delay:
+                _LOGGER.info("Reconnecting to CN360 server in %.1f s", delay)
+            await asyncio.sleep(delay)
+
+    async def _run_stream(self) -> None:
+        """Read frames from a stream connection until it is lost."""
+        reader, writer = await asyncio.open_connection(self._ip, self._port)
+        _LOGGER.info("Connected to CN360 server")
+
+        # Save writer for outgoing commands
+        self._set_connected(writer)
+
+        decoder = FrameDecoder()
+        try:
+            while True:
+                data = await reader.read(READ_CHUNK_SIZE)
+                if not data:
+                    raise ConnectionResetError("Connection closed by server")
+
+                discarded = decoder.discarded
+                for payload_bytes in decoder.feed(data):
+                    self._handle_frame(payload_bytes)
+                if decoder.discarded != discarded:
+                    _LOGGER.warning(
+                        "Skipped %d bytes of unknown data",
+                        decoder.discarded - discarded,
+                    )
+        finally:
+            writer.close()
+
+    async def _run_protocol(self) -> None:
+        """Dispatch frames from a protocol connection until it is lost."""
+        _, protocol = await self.hass.loop.create_connection(
+            lambda: FrameProtocol(self._handle_frame), self._ip, self._port
+        )
+        _LOGGER.info("Connected to CN360 server")
+
+        # Save protocol for outgoing commands
+        self._set_connected(protocol)
+
+        try:
+            await protocol.wait_closed()
+        finally:
+            protocol.close()
+        raise ConnectionResetError("Connection closed by server")
+
+    def _set_connected(self, writer: asyncio.StreamWriter | FrameProtocol) -> None:
+        """Start sending commands to and supervising a new connection."""
+        now = self.hass.loop.time()
+        if self._disconnected_at is not None:
+            self._reconnect_count += 1
+            self._reconnect_time = now - self._disconnected_at
+            self._disconnected_at = None
+            _LOGGER.info(
+                "Reconnected to CN360 server after %.1f s", self._reconnect_time
+            )
+        _enable_keepalive(writer.get_extra_info("socket"))
+
+        self._writer = writer
+        self._writer_task = self.hass.async_create_background_task(
+            self._async_write_commands(writer), "CN360-writer"
+        )
+        self._last_receive = now
+        self._watchdog_task = self.hass.async_create_background_task(
+            self._async_watch_idle(writer), "CN360-watchdog"
+        )
+        for robot in self._all_robots():
+            robot.async_set_bridge_connected(True)
+
+    def _set_disconnected(self) -> None:
+        """Stop sending commands and drop the ones not sent yet."""
+        if self._writer is not None:
+            self._disconnected_at = self.hass.loop.time()
+        for task in (self._writer_task, self._watchdog_task):
+            if task is not None:
+                task.cancel()
+        self._writer_task = None
+        self._watchdog_task = None
+        self._writer = None
+        self._drop_commands()
+        for robot in self._all_robots():
+            robot.async_set_bridge_connected(False)
+
+    def _drop_commands(self) -> None:
+        """Drop the commands not written yet, telling their senders."""
+        while not self._command_queue.empty():
+            sent = self._command_queue.get_nowait()[3]
+            # Cancelled if the sender gave up waiting
+            if not sent.done():
+                sent.set_result(False)
+
+    async def _async_write_commands(
+        self, writer: asyncio.StreamWriter | FrameProtocol
+    ) -> None:
+        """Write queued commands, everything queued is drained at once.
+
+        Commands are unframed JSON, every command gets its own write like
+        the proxy expects.
+        """
+        while True:
+            batch = [await self._command_queue.get()]
+            while not self._command_queue.empty():
+                batch.append(self._command_queue.get_nowait())
+            written = False
+            try:
+                for _, _, packet, _ in batch:
+                    if self._trace_sampling:
+                        self._record_trace("tx", packet)
+                    writer.write(packet)
+                await writer.drain()
+                written = True
+                _LOGGER.debug("Sent %d command(s)", len(batch))
+            except Exception as e:  # noqa: BLE001
+                _LOGGER.error("Failed to send command: %s", e)
+            finally:
+                for *_, sent in batch:
+                    if not sent.done():
+                        sent.set_result(written)
+
+    async def _async_watch_idle(
+        self, writer: asyncio.StreamWriter | FrameProtocol
+    ) -> None:
+        """Probe a silent connection and close it if it stays silent.
+
+        The probe is given up if it cannot be written in time, e.g. because
+        the send buffer of a dead connection is full.
+        """
+        loop = self.hass.loop
+        while True:
+            idle = loop.time() - self._last_receive
+            if idle < READ_IDLE_TIMEOUT:
+                await asyncio.sleep(READ_IDLE_TIMEOUT - idle)
+                continue
+
+            probed_at = loop.time()
+            _LOGGER.debug("No data for %.0f s, probing CN360 server", idle)
+            try:
+                async with asyncio.timeout(READ_PROBE_TIMEOUT):
+                    for sn in tuple(self._robots) or (None,):
+                        await self.async_send(
+                            encode_command(PROBE_COMMAND, sn, {}), PRIORITY_REFRESH
+                        )
+            except TimeoutError:
+                _LOGGER.debug("Probe not written within %d s", READ_PROBE_TIMEOUT)
+            await asyncio.sleep(max(0, probed_at + READ_PROBE_TIMEOUT - loop.time()))
+            if self._last_receive < probed_at:
+                _LOGGER.warning(
+                    "CN360 server did not answer for %.0f s, reconnecting",
+                    loop.time() - self._last_receive,
+                )
+                # Abort, closing would wait for unsent data to be flushed
+                if writer.transport is not None:
+                    writer.transport.abort()
+                return
+
+    @callback
+    def _handle_frame(self, payload_bytes: bytes) -> None:
+        """Route the payload of one frame to its robot."""
+        self._frame_count += 1
+        self._last_receive = self.hass.loop.time()
+        if self._trace_sampling and not self._frame_count % self._trace_sampling:
+            self._record_trace("rx", payload_bytes)
+        try:
+            message = decode_message(payload_bytes)
+        except ValueError:
+            _LOGGER.warning("Invalid JSON payload of %d bytes", len(payload_bytes))
+            return
+        if message is None:
+            return
+
+        if message.sn is None:
+            # Not addressed to a robot, every robot gets it
+            for robot in self._all_robots():
+                robot.async_handle_message(message)
+        elif (robot := self._get_robot(message.sn)) is not None:
+            robot.async_handle_message(message)
+        else:
+            _LOGGER.debug("No robot set up for sn %s, dropping packet", message.sn)
+
+    def _record_trace(self, direction: str, payload: bytes) -> None:
+        """Add a frame to the trace."""
+        self._trace.append(
+            TraceEntry(
+                time.time(), direction, len(payload), payload[:TRACE_MAX_PAYLOAD]
+            )
+        )
+
+    def _get_robot(self, sn: str) -> CN360Coordinator | None:
+        """Return the robot for sn, the first unbound robot claims a new sn.
+
+        Serial numbers configured in other entries are left for them, even if
+        they are not set up yet.
+        """
+        if (
+            (robot := self._robots.get(sn)) is None
+            and self._unbound
+            and sn not in self._configured_serials()
+        ):
+            robot = self._unbound.pop(0)
+            robot.async_bind(sn)
+            self._robots[sn] = robot
+        return robot
+
+    def _configured_serials(self) -> set[str]:
+        """Return the serial numbers configured in the config entries."""
+        return {
+            serial
+            for entry in self.hass.config_entries.async_entries(DOMAIN)
+            if (serial := entry.data.get(CONF_SERIAL))
+        }
+
+    def _all_robots(self) -> tuple[CN360Coordinator, ...]:
+        """Return all robots set up on the bridge."""
+        return (*self._robots.values(), *self._unbound)
+
+    async def async_send(self, packet: bytes, priority: int) -> bool:
+        """Send a command packet through the writer task.
+
+        Waits while the queue is full and until the packet is written. Returns
+        False if not connected or the connection is lost before writing it.
+        """
+        if not self.isConnected():
+            _LOGGER.error("Cannot send command, not connected to CN360 server")
+            return False
+        sent: asyncio.Future[bool] = self.hass.loop.create_future()
+        await self._command_queue.put((priority, next(self._command_seq), packet, sent))
+        if not self.isConnected():
+            # Lost while waiting for room in the queue
+            self._drop_commands()
+        return await sent
+
+    async def async_disconnect(self) -> None:
+        """Stop the connection task and close the connection.
+
+        Returns once the tasks have finished, so nothing keeps running after
+        the config entry is unloaded.
+        """
+        tasks = [
+            task
+            for task in (self._run_task, self._writer_task, self._watchdog_task)
+            if task is not None
+        ]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+        self._run_task = self._writer_task = self._watchdog_task = None
+        self._drop_commands()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def isConnected(self) -> bool:
+        """Return True if connected to the bridge."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    def getTrace(self) -> list[TraceEntry]:
+        """Return the recently traced frames, oldest first.
+
+        Sent commands are always traced, received frames are sampled.
+        """
+        return list(self._trace)
+
+    def getFrameCount(self) -> int:
+        """Return the number of frames received."""
+        return self._frame_count
+
+    def getCommandQueueDepth(self) -> int:
+        """Return the number of commands waiting to be written."""
+        return self._command_queue.qsize()
+
+    def getReconnectCount(self) -> int:
+        """Return the number of times the connection was re-established."""
+        return self._reconnect_count
+
+    def getReconnectTime(self) -> float | None:
+        """Return the seconds the last reconnect took, from loss to connected."""
+        return self._reconnect_time
+
+    def getTransport(self) -> str:
+        """Return the transport used for the connection."""
+        return self._transport
+
+    def getTraceSampling(self) -> int:
+        """Return N if every Nth received frame is traced, 0 if none is."""
+        return self._trace_sampling
+
+
+def _reconnect_delay(attempt: int) -> float:
+    """Return the delay before reconnect attempt, counted from 0."""
+    if attempt == 0:
+        return 0
+    delay = min(RECONNECT_DELAY_MAX, RECONNECT_DELAY_MIN * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1)
+
+
+def _enable_keepalive(sock: socket.socket | None) -> None:
+    """Enable TCP keepalive with short timings where the platform allows."""
+    if sock is None:
+        return
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (
+        ("TCP_KEEPIDLE", KEEPALIVE_IDLE),
+        ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+        ("TCP_KEEPCNT", KEEPALIVE_COUNT),
+    ):
+        if hasattr(socket, option):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+
+@callback
+def async_get_bridge(
+    hass: HomeAssistant, ip: str, port: int, transport: str, trace_sampling: int
+) -> CN360Bridge:
+    """Return the running bridge for ip:port, starting it if needed.
+
+    The options of the first entry set up on a bridge are used.
+    """
+    bridges: dict[tuple[str, int], CN360Bridge] = hass.data.setdefault(DATA_BRIDGES, {})
+    if (bridge := bridges.get((ip, port))) is None:
+        bridge = bridges[(ip, port)] = CN360Bridge(
+            hass, ip, port, transport, trace_sampling
+        )
+        bridge.async_start()
+    elif (transport, trace_sampling) != (
+        bridge.getTransport(),
+        bridge.getTraceSampling(),
+    ):
+        _LOGGER.warning(
+            "CN360 server %s:%d is shared with another entry, keeping its %s"
+            " transport and trace sampling of %d, reload all entries of the"
+            " server to change them",
+            ip,
+            port,
+            bridge.getTransport(),
+            bridge.getTraceSampling(),
+        )
+    return bridge
+
+
+async def async_release_bridge(hass: HomeAssistant, bridge: CN360Bridge) -> None:
+    """Disconnect a bridge once no robot is set up on it anymore."""
+    if bridge.hasRobots():
+        return
+    bridges: dict[tuple[str, int], CN360Bridge] = hass.data.get(DATA_BRIDGES, {})
+    for key, running in tuple(bridges.items()):
+        if running is bridge:
+            del bridges[key]
+    if not bridges:
+        hass.data.pop(DATA_BRIDGES, None)
+    await bridge.async_disconnect()
@@ -58,7 +58,8 @@ class CN360BaseButton(CN360BaseEntity, ButtonEntity):
         category: EntityCategory = None,
     ) -> None:
         """Init function."""
-        super().__init__(hass, entry)
+        # Buttons do not depend on robot data
+        super().__init__(hass, entry, ())
         self._attr_name = name
         self._attr_unique_id = f"{self._coordinator.getSerialNumber()}_{uid}"
         self._attr_device_class = dev_class
@@ -7,12 +7,27 @@ from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_UNIQUE_ID
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import CONF_IP, CONF_PORT, DOMAIN
+from .const import (
+    CONF_IP,
+    CONF_PORT,
+    CONF_SERIAL,
+    CONF_TRACE_SAMPLING,
+    CONF_TRANSPORT,
+    DEFAULT_TRACE_SAMPLING,
+    DEFAULT_TRANSPORT,
+    DOMAIN,
+    TRANSPORTS,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,6 +41,7 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
             CONF_PORT,
             default="4468",
         ): int,
+        vol.Optional(CONF_SERIAL): str,
     }
 )
 
@@ -36,10 +52,11 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
 
-    return {
-        "title": "360 Robot",
-        CONF_UNIQUE_ID: f"360_robot_{data[CONF_IP]}_{data[CONF_PORT]}",
-    }
+    unique_id = f"360_robot_{data[CONF_IP]}_{data[CONF_PORT]}"
+    if serial := data.get(CONF_SERIAL):
+        # Several robots can share a bridge
+        return {"title": f"360 Robot {serial}", CONF_UNIQUE_ID: f"{unique_id}_{serial}"}
+    return {"title": "360 Robot", CONF_UNIQUE_ID: unique_id}
 
 
 class ConfigFlow(ConfigFlow, domain=DOMAIN):
@@ -47,6 +64,12 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Create the options flow."""
+        return CN360OptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -74,6 +97,37 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
         )
 
 
+class CN360OptionsFlow(OptionsFlow):
+    """Handle options for 360 Robot."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_TRANSPORT,
+                        default=self.config_entry.options.get(
+                            CONF_TRANSPORT, DEFAULT_TRANSPORT
+                        ),
+                    ): vol.In(TRANSPORTS),
+                    vol.Required(
+                        CONF_TRACE_SAMPLING,
+                        default=self.config_entry.options.get(
+                            CONF_TRACE_SAMPLING, DEFAULT_TRACE_SAMPLING
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1000)),
+                }
+            ),
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -9,9 +9,19 @@ DOMAIN = "cn360"
 # Configuration constants
 CONF_IP = "ip"
 CONF_PORT = "port"
+CONF_SERIAL = "serial"
+CONF_TRANSPORT = "transport"
+CONF_TRACE_SAMPLING = "trace_sampling"
+
+# Connection transports
+TRANSPORT_STREAM = "stream"
+TRANSPORT_PROTOCOL = "protocol"
+TRANSPORTS = [TRANSPORT_STREAM, TRANSPORT_PROTOCOL]
 
 # Default values
 DEFAULT_NAME = "360 Robot"
+DEFAULT_TRANSPORT = TRANSPORT_STREAM
+DEFAULT_TRACE_SAMPLING = 0
 
 # Services
 SERVICE_START_CLEANING = "start_cleaning"
@@ -20,6 +30,58 @@ SERVICE_RESUME = "resume"
 SERVICE_RETURN_TO_BASE = "return_to_base"
 SERVICE_SET_CLEANING_MODE = "set_cleaning_mode"
 
+# Pseudo data keys for connection state, usable with key-scoped listeners
+KEY_ROBOT_CONNECTED = "robot_connected"
+KEY_CLOUD_CONNECTED = "cloud_connected"
+
+# Setpoint commands where only the latest value matters. Maps infoType to the
+# coalesced cmd values, None coalesces every cmd of the infoType.
+COALESCED_COMMANDS: dict[int, frozenset[str] | None] = {
+    21022: None,  # fan speed, cmd is the speed
+    21024: frozenset({"setledswitch", "setSoftAlongWall", "setAutoBoost", "setVolume"}),
+}
+COMMAND_COALESCE_WINDOW = 0.3  # seconds
+
+# Command priorities, lower values are sent first
+PRIORITY_SAFETY = 0
+PRIORITY_NORMAL = 1
+PRIORITY_REFRESH = 2
+SAFETY_COMMANDS = frozenset({21012, 21017})  # stop / return to base, pause
+COMMAND_QUEUE_SIZE = 64
+COMMAND_TIMEOUT = 10  # seconds to wait for a command response
+
+# Packet trace for diagnostics, every Nth received frame is recorded
+TRACE_SIZE = 200  # frames
+TRACE_MAX_PAYLOAD = 16 * 1024  # bytes kept per frame
+
+# Persisted robot state for warm starts
+STORAGE_VERSION = 1
+STORE_SAVE_DELAY = 30  # seconds
+STORE_MAX_DATA_SIZE = 256 * 1024  # bytes of JSON robot data
+STORE_MAX_MAP_SIZE = 512 * 1024  # bytes of PNG
+STORE_MAP_MODES = ("charge", "fullcharge")  # docked, the map is final
+
+# Seconds to wait for the robot to identify itself during setup
+IDENTIFY_TIMEOUT = 30
+
+# Reconnect backoff, the first retry is immediate
+RECONNECT_DELAY_MIN = 1  # seconds
+RECONNECT_DELAY_MAX = 60  # seconds
+
+# A connection silent for READ_IDLE_TIMEOUT is probed with a status request
+# and dropped if it stays silent for READ_PROBE_TIMEOUT
+READ_IDLE_TIMEOUT = 60  # seconds
+READ_PROBE_TIMEOUT = 10  # seconds
+PROBE_COMMAND = 21014  # status request
+
+# TCP keepalive, detects dead peers the application deadline cannot reach
+KEEPALIVE_IDLE = 30  # seconds
+KEEPALIVE_INTERVAL = 10  # seconds
+KEEPALIVE_COUNT = 3
+
+# Optimistic values are shown until the robot reports them or this passes
+OPTIMISTIC_TIMEOUT = 5  # seconds
+
 # Update intervals
 UPDATE_INTERVAL_LOCAL = timedelta(seconds=5)  # 5 seconds for local polling
 
@@ -3,18 +3,60 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import base64
+from collections.abc import Iterable, Mapping
 import logging
+from types import MappingProxyType
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryError, HomeAssistantError
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import CONF_IP, CONF_PORT, DOMAIN
+from .bridge import CN360Bridge, async_get_bridge, async_release_bridge
+from .const import (
+    COALESCED_COMMANDS,
+    COMMAND_COALESCE_WINDOW,
+    COMMAND_TIMEOUT,
+    CONF_IP,
+    CONF_PORT,
+    CONF_SERIAL,
+    CONF_TRACE_SAMPLING,
+    CONF_TRANSPORT,
+    DEFAULT_TRACE_SAMPLING,
+    DEFAULT_TRANSPORT,
+    DOMAIN,
+    KEY_CLOUD_CONNECTED,
+    KEY_ROBOT_CONNECTED,
+    OPTIMISTIC_TIMEOUT,
+    PRIORITY_NORMAL,
+    PRIORITY_REFRESH,
+    PRIORITY_SAFETY,
+    SAFETY_COMMANDS,
+    STORAGE_VERSION,
+    STORE_MAX_DATA_SIZE,
+    STORE_MAP_MODES,
+    STORE_MAX_MAP_SIZE,
+    STORE_SAVE_DELAY,
+)
+from .models import EMPTY_SNAPSHOT, RobotDataSnapshot, TraceEntry, merge_data
+from .protocol import (
+    LocalMessage,
+    Message,
+    RobotMessage,
+    ServerMessage,
+    encode_command,
+    json_dumps,
+    json_loads,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# Listeners registered without keys are notified on every change
+_KEY_ANY = "*"
+
 
 class CN360Coordinator(DataUpdateCoordinator[dict[str, Any]]):
     """Class to manage fetching CN360 robot vacuum data and sending commands."""
@@ -22,126 +64,132 @@ class CN360Coordinator(DataUpdateCoordinator[dict[str, Any]]):
     def __init__(
         self,
         hass: HomeAssistant,
-        local_server_ip: str,
-        local_server_port: int,
+        bridge: CN360Bridge,
+        serial_number: str | None = None,
+        store: Store[dict[str, Any]] | None = None,
+        restored: Mapping[str, Any] | None = None,
     ) -> None:
-        """Initialize data update coordinator and connection."""
+        """Initialize data update coordinator of a robot on the bridge.
+
+        Without a serial number the robot claims the first unclaimed sn the
+        bridge receives. Restored state from the store is shown until the
+        robot reports.
+        """
         super().__init__(
             hass,
             _LOGGER,
-            name=f"{DOMAIN}_{local_server_ip}_{local_server_port}",
+            name=f"{DOMAIN}_{serial_number or id(self)}",
         )
+        self._bridge = bridge
 
-        # Connection parameters
-        self._ip = local_server_ip
-        self._port = local_server_port
-
-        # Robot data state
+        # Robot data state, replaced instead of mutated once published
         self._robotData: dict[str, Any] = {}
+        self._snapshot: RobotDataSnapshot = EMPTY_SNAPSHOT
+
+        # Values written but not reported by the robot yet, shown on top of
+        # the robot data until confirmed or expired
+        self._optimistic: dict[str, tuple[Any, asyncio.TimerHandle]] = {}
         self._robotConnected: bool = False
         self._cloudConnected: bool = False
-        self._serial_number: str | None = None
+        self._serial_number = serial_number
+        self._identified = asyncio.Event()
+
+        # Persisted state, written at most every STORE_SAVE_DELAY. The map
+        # changes while cleaning, it is only persisted once the robot docks
+        # or the entry unloads.
+        self._store = store
+        self._save_scheduled = False
+        self._map_image: bytes | None = None
+        self._stored_map: str | None = None
+        self._map_saved = True
+
+        # Listeners per robot data key
+        self._key_listeners: dict[str, list[CALLBACK_TYPE]] = {}
 
-        # TCP writer for sending commands
-        self._writer: asyncio.StreamWriter | None = None
+        # Futures waiting for a response, by infoType
+        self._pending_acks: dict[int, list[asyncio.Future[Message]]] = {}
+        self._command_rtt: float | None = None
 
-        # Start background task for maintaining connection
-        hass.async_create_background_task(self._run(), "CN360-TCP-Task")
+        # Coalesced setpoint commands, by (infoType, cmd)
+        self._coalesce_timers: dict[tuple[int, Any], asyncio.TimerHandle] = {}
+        self._coalesce_pending: dict[tuple[int, Any], dict[str, Any]] = {}
+
+        if restored:
+            self._restore(restored)
 
         # Notify any initial listeners
         self.async_update_listeners()
 
-    async def _run(self) -> None:
-        """Maintain TCP connection, read packets, and update state."""
-        while True:
-            try:
-                _LOGGER.info(
-                    "Connecting to CN360 server at %s:%d", self._ip, self._port
+        self._remove_from_bridge = bridge.async_add_robot(self)
+
+    @callback
+    def async_bind(self, sn: str) -> None:
+        """Bind the robot to the sn it claimed."""
+        _LOGGER.info("Robot %s claimed, set its serial number to keep it", sn)
+        self._serial_number = sn
+
+    @callback
+    def async_set_bridge_connected(self, connected: bool) -> None:
+        """Handle the bridge connection being made or lost."""
+        if not connected:
+            for futures in self._pending_acks.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(CommandError("Connection lost"))
+            self._pending_acks.clear()
+            self._async_notify_keys(self._clear_optimistic(tuple(self._optimistic)))
+        self._set_robot_connected(connected)
+
+    @callback
+    def async_handle_message(self, message: Message) -> None:
+        """Handle a message the bridge routed to this robot."""
+        if message.sn is not None and not self._identified.is_set():
+            _LOGGER.debug("Robot %s identified", message.sn)
+            self._identified.set()
+        self._resolve_ack(message)
+        if isinstance(message, RobotMessage):
+            self._handle_robot_message(message)
+        elif isinstance(message, LocalMessage):
+            self._handle_local_message(message)
+        elif isinstance(message, ServerMessage) and _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Server message: %s", message.payload)
+
+    def _handle_robot_message(self, message: RobotMessage) -> None:
+        """Handle messages from robot origin."""
+        changed: set[str] = set()
+
+        if (
+            message.robot_connected is not None
+            and message.robot_connected != self._robotConnected
+        ):
+            self._robotConnected = message.robot_connected
+            changed.add(KEY_ROBOT_CONNECTED)
+            if self._robotConnected:
+                self.hass.async_create_background_task(
+                    self._request_data(), "CN360-request-data"
                 )
-                reader, writer = await asyncio.open_connection(self._ip, self._port)
-                _LOGGER.info("Connected to CN360 server")
-
-                # Save writer for outgoing commands
-                self._writer = writer
-                self._robotConnected = True
-                self.async_update_listeners()
-
-                while True:
-                    # Read packet header
-                    header = await reader.readexactly(2)
-
-                    # Data packet: 0x16 0x16
-                    if header == b"\x16\x16":
-                        # Read length (2 bytes, big endian)
-                        length_bytes = await reader.readexactly(2)
-                        length = int.from_bytes(length_bytes, "big")
-                        payload_bytes = await reader.readexactly(length)
-
-                        try:
-                            payload = json.loads(payload_bytes)
-                        except json.JSONDecodeError:
-                            _LOGGER.warning("Invalid JSON payload: %s", payload_bytes)
-                            continue
-
-                        origin = payload.get("origin")
-                        if origin == "robot":
-                            payload.pop("origin", None)
-                            # Update robot data
-                            self._serial_number = payload.get("sn", self._serial_number)
-
-                            if (
-                                payload.get("robot_connected", self._robotConnected)
-                                != self._robotConnected
-                            ):
-                                self._robotConnected = payload.get(
-                                    "robot_connected", self._robotConnected
-                                )
-                                if self._robotConnected:
-                                    await self._request_data()
-
-                            self._cloudConnected = payload.get(
-                                "cloud_connected", self._cloudConnected
-                            )
-
-                            if (not payload.get("data", None)) and (
-                                payload.get("cache", None)
-                            ):
-                                self._robotData.update(payload.get("cache", {}))
-                            else:
-                                self._robotData.update(
-                                    payload.get("data", {}).get("data", {})
-                                )
-                            self.async_update_listeners()
-                            _LOGGER.info("Robot message: %s", payload)
-
-                        elif origin == "local":
-                            self._handle_local_message(payload)
-
-                        elif origin == "server":
-                            _LOGGER.info("Server message: %s", payload)
-                        else:
-                            _LOGGER.debug(
-                                "Unknown origin '%s', dropping packet", origin
-                            )
-
-                    else:
-                        _LOGGER.warning("Unknown packet header: %s", header)
-                        await reader.read(1)  # resync
-
-            except asyncio.IncompleteReadError:
-                _LOGGER.error("Connection lost to CN360 server, retrying")
-            except Exception:
-                _LOGGER.exception("Error in CN360 coordinator loop")
-
-            # Clean up writer state
-            self._writer = None
-            self._robotConnected = False
-            self.async_update_listeners()
-
-            # Retry after delay
-            await asyncio.sleep(5)
+
+        if (
+            message.cloud_connected is not None
+            and message.cloud_connected != self._cloudConnected
+        ):
+            self._cloudConnected = message.cloud_connected
+            changed.add(KEY_CLOUD_CONNECTED)
+
+        if data_changed := self._apply_update(message.data):
+            if "mode" in data_changed and self._is_docked():
+                self._save_map()
+            self._schedule_save()
+        self._async_notify_keys(changed | data_changed)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Robot message: %s", message.payload)
 
     async def _request_data(self):
+        # Answered by the robot, measures the command round trip without
+        # holding back the other requests
+        self.hass.async_create_background_task(
+            self._request_status(), "CN360-request-status"
+        )
         await self.sendCommand(
             30000,
             {
@@ -152,29 +200,241 @@ class CN360Coordinator(DataUpdateCoordinator[dict[str, Any]]):
                     {"data": {}, "infoType": "21008"},
                 ],
             },
+            priority=PRIORITY_REFRESH,
         )
-        await self.sendCommand(21034, {})
+        await self.sendCommand(21034, {}, priority=PRIORITY_REFRESH)
         await self.sendCommand(
             21011,
             {"startPos": 3, "userId": "35fac39293313047a911b3e210bed1ef", "mask": 0},
+            priority=PRIORITY_REFRESH,
         )
-        await self.sendCommand(21019, {})
+        await self.sendCommand(21019, {}, priority=PRIORITY_REFRESH)
+
+    async def _request_status(self) -> None:
+        """Request the robot status and wait for the reply."""
+        try:
+            await self.sendCommand(21014, {}, priority=PRIORITY_REFRESH, wait=True)
+        except CommandError as err:
+            _LOGGER.debug("Status request of %s failed: %s", self._serial_number, err)
 
-    def _handle_local_message(self, data: dict) -> None:
+    def _handle_local_message(self, message: LocalMessage) -> None:
         """Handle messages from local origin."""
-        changed = False
-        connected = data.get("connected", False)
+        self._set_robot_connected(message.connected)
+
+    def _set_robot_connected(self, connected: bool) -> None:
+        """Update the robot connection state and notify on change."""
         if connected != self._robotConnected:
             self._robotConnected = connected
-            changed = True
+            self._async_notify_keys((KEY_ROBOT_CONNECTED,))
+
+    def _apply_update(self, update: dict[str, Any]) -> set[str]:
+        """Merge a robot data update and return the keys whose value changed.
+
+        Nested values are merged, see merge_data. Optimistic values the update
+        confirms are dropped. Publishes a new snapshot if anything changed.
+        """
+        self._robotData, paths = merge_data(self._robotData, update)
+        for key in update.keys() & self._optimistic.keys():
+            value, timer = self._optimistic[key]
+            if self._robotData[key] == value:
+                timer.cancel()
+                del self._optimistic[key]
+        return self._publish_snapshot({path[0] for path in paths}, paths)
+
+    def _restore(self, stored: Mapping[str, Any]) -> None:
+        """Show the persisted robot data and map until the robot reports."""
+        if data := stored.get("data"):
+            self._apply_update(json_loads(data))
+        if (image := stored.get("map")) is not None:
+            self._stored_map = image
+            self._map_image = base64.b64decode(image)
+        self._identified.set()
+        _LOGGER.debug(
+            "Restored %d values of robot %s", len(self._robotData), self._serial_number
+        )
+
+    def _schedule_save(self) -> None:
+        """Persist the robot state after STORE_SAVE_DELAY."""
+        if self._store is not None and not self._save_scheduled:
+            self._save_scheduled = True
+            self._store.async_delay_save(self._data_to_store, STORE_SAVE_DELAY)
 
-        self._serial_number = data.get("sn")
+    def _save_map(self) -> None:
+        """Persist the current map with the next save."""
+        if self._map_saved or self._map_image is None:
+            return
+        self._map_saved = True
+        if len(self._map_image) <= STORE_MAX_MAP_SIZE:
+            self._stored_map = base64.b64encode(self._map_image).decode("ascii")
+            self._schedule_save()
+        else:
+            _LOGGER.debug("Map too large to persist")
+
+    @callback
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the robot state to persist, leaving out oversized parts.
+
+        The robot data is stored as JSON text, so it is only encoded once.
+        """
+        self._save_scheduled = False
+        stored: dict[str, Any] = {"sn": self._serial_number}
+        data = json_dumps(self._robotData)
+        if len(data) <= STORE_MAX_DATA_SIZE:
+            stored["data"] = data.decode("utf-8")
+        else:
+            _LOGGER.debug("Robot data too large to persist")
+        if self._stored_map is not None:
+            stored["map"] = self._stored_map
+        return stored
+
+    def _publish_snapshot(
+        self, keys: Iterable[str], paths: Iterable[tuple[Any, ...]] = ()
+    ) -> set[str]:
+        """Publish the robot data with optimistic values on top.
+
+        paths are the changed nested values below keys, keys without any are
+        changed as a whole. Returns the given keys whose published value
+        changed.
+        """
+        data = self._robotData
+        if self._optimistic:
+            data = {
+                **data,
+                **{key: value for key, (value, _) in self._optimistic.items()},
+            }
+        old = self._snapshot.data
+        changed = {
+            key
+            for key in keys
+            if old.get(key) is not data.get(key)
+            and ((key in old) != (key in data) or old.get(key) != data.get(key))
+        }
         if changed:
-            self.async_update_listeners()
+            changed_paths = {path for path in paths if path[0] in changed}
+            changed_paths.update(
+                (key,) for key in changed - {path[0] for path in changed_paths}
+            )
+            self._snapshot = RobotDataSnapshot(
+                self._snapshot.generation + 1,
+                MappingProxyType(data),
+                frozenset(changed_paths),
+            )
+        return changed
+
+    def _set_optimistic(self, values: Mapping[str, Any]) -> None:
+        """Show values before the robot reports them."""
+        for key, value in values.items():
+            if key in self._optimistic:
+                self._optimistic[key][1].cancel()
+            self._optimistic[key] = (
+                value,
+                self.hass.loop.call_later(
+                    OPTIMISTIC_TIMEOUT, self._expire_optimistic, key
+                ),
+            )
+        self._async_notify_keys(self._publish_snapshot(values))
+
+    @callback
+    def _expire_optimistic(self, key: str) -> None:
+        """Fall back to the reported value of a key the robot did not confirm."""
+        if self._optimistic.pop(key, None) is not None:
+            _LOGGER.debug("Optimistic value of %s not confirmed, rolling back", key)
+            self._async_notify_keys(self._publish_snapshot((key,)))
+
+    def _clear_optimistic(
+        self, keys: Iterable[str], values: Mapping[str, Any] | None = None
+    ) -> set[str]:
+        """Drop optimistic values and return the keys whose value changed.
+
+        With values, only entries still holding the given value are dropped.
+        """
+        cleared = []
+        for key in keys:
+            entry = self._optimistic.get(key)
+            if entry is None or (values is not None and entry[0] != values[key]):
+                continue
+            entry[1].cancel()
+            del self._optimistic[key]
+            cleared.append(key)
+        return self._publish_snapshot(cleared) if cleared else set()
+
+    @callback
+    def async_add_key_listener(
+        self, update_callback: CALLBACK_TYPE, keys: Iterable[str] | None = None
+    ) -> CALLBACK_TYPE:
+        """Listen for changes of the given robot data keys.
+
+        Listeners registered without keys are notified on every change.
+        """
+        subscribed = (_KEY_ANY,) if keys is None else tuple(keys)
+        for key in subscribed:
+            self._key_listeners.setdefault(key, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove key listener."""
+            for key in subscribed:
+                callbacks = self._key_listeners.get(key, [])
+                if update_callback in callbacks:
+                    callbacks.remove(update_callback)
+                if not callbacks:
+                    self._key_listeners.pop(key, None)
+
+        return remove_listener
+
+    @callback
+    def _async_notify_keys(self, changed: Iterable[str]) -> None:
+        """Notify the listeners subscribed to any of the changed keys."""
+        changed = tuple(changed)
+        if not changed:
+            return
+
+        notified: set[CALLBACK_TYPE] = set()
+        for key in (*changed, _KEY_ANY):
+            for update_callback in tuple(self._key_listeners.get(key, ())):
+                if update_callback not in notified:
+                    notified.add(update_callback)
+                    update_callback()
+
+        # Plain coordinator listeners still get every change
+        self.async_update_listeners()
+
+    async def async_disconnect(self) -> None:
+        """Stop routing frames to the robot, releasing the bridge if unused.
+
+        Commands waiting for an answer fail and a pending save is written now
+        with the latest map, so a reloaded entry starts from the latest state.
+        """
+        self._remove_from_bridge()
+        self.async_set_bridge_connected(False)
+        for timer in self._coalesce_timers.values():
+            timer.cancel()
+        self._coalesce_timers.clear()
+        self._coalesce_pending.clear()
+        for _, timer in self._optimistic.values():
+            timer.cancel()
+        self._optimistic.clear()
+        self._save_map()
+        if self._store is not None and self._save_scheduled:
+            await self._store.async_save(self._data_to_store())
+        await async_release_bridge(self.hass, self._bridge)
+
+    def getListenerCount(self) -> int:
+        """Return the number of live key and plain listeners."""
+        key_listeners = {
+            update_callback
+            for callbacks in self._key_listeners.values()
+            for update_callback in callbacks
+        }
+        return len(key_listeners) + len(self._listeners)
+
+    def getRobotData(self) -> Mapping[str, Any]:
+        """Return a read-only view of the latest robot data."""
+        return self._snapshot.data
 
-    def getRobotData(self) -> dict[str, Any]:
-        """Return the latest robot data."""
-        return self._robotData.copy()
+    def getSnapshot(self) -> RobotDataSnapshot:
+        """Return the latest robot data snapshot."""
+        return self._snapshot
 
     def isRobotConnected(self) -> bool:
         """Return True if the robot is currently connected."""
@@ -184,35 +444,236 @@ class CN360Coordinator(DataUpdateCoordinator[dict[str, Any]]):
         """Return True if the cloud is currently connected."""
         return self._cloudConnected
 
+    def getMapImage(self) -> bytes | None:
+        """Return the last rendered map as PNG."""
+        return self._map_image
+
+    def setMapImage(self, image: bytes) -> None:
+        """Store a rendered map so it can be shown on the next start."""
+        self._map_image = image
+        self._map_saved = False
+        if self._is_docked():
+            self._save_map()
+
+    def _is_docked(self) -> bool:
+        """Return True if the robot reports being on its dock."""
+        return self._robotData.get("mode") in STORE_MAP_MODES
+
+    async def async_wait_identified(self, timeout: float) -> None:
+        """Wait until the robot sent its first message.
+
+        Raises TimeoutError if it does not within timeout.
+        """
+        async with asyncio.timeout(timeout):
+            await self._identified.wait()
+
     def getSerialNumber(self) -> str | None:
         """Return Serial Number of Robot."""
         return self._serial_number
 
-    async def sendCommand(self, infoType: int, data: dict[str, Any]) -> None:
-        """Send a command packet to the CN360 server."""
-        if not self._writer or self._writer.is_closing():
-            _LOGGER.error("Cannot send command, not connected to CN360 server")
-            return
-
-        # Build payload with origin 'local'
-        packet: dict[str, Any] = {
-            "origin": "ha",
-            "infoType": infoType,
-            "sn": self._serial_number,
-            "data": data,
-        }
-        payload_bytes = json.dumps(packet).encode("utf-8")
+    async def sendCommand(
+        self,
+        infoType: int,
+        data: dict[str, Any],
+        *,
+        priority: int | None = None,
+        wait: bool = False,
+        timeout: float = COMMAND_TIMEOUT,
+        optimistic: Mapping[str, Any] | None = None,
+    ) -> Message | None:
+        """Send a command packet to the CN360 server.
+
+        Commands are queued for the writer task, safety commands first. Waits
+        while the queue is full. Setpoint commands repeated within the
+        coalesce window are collapsed, only the latest value is sent when the
+        window closes.
+
+        With wait, the command is never coalesced and the first reply of this
+        robot with the same infoType is returned, only use it for commands the
+        robot is known to answer. Raises CommandError if it cannot be sent,
+        reports an error or no reply arrives within timeout.
+
+        Optimistic robot data values are published right away and kept until
+        the robot reports them, the command fails or OPTIMISTIC_TIMEOUT passes.
+        """
+        if priority is None:
+            priority = (
+                PRIORITY_SAFETY if infoType in SAFETY_COMMANDS else PRIORITY_NORMAL
+            )
+        if optimistic:
+            self._set_optimistic(optimistic)
+
+        if not wait:
+            if (key := _coalesce_key(infoType, data)) is not None:
+                if key in self._coalesce_timers:
+                    self._coalesce_pending[key] = data
+                    return None
+                self._open_coalesce_window(key)
+            if not await self._send(infoType, data, priority) and optimistic:
+                self._async_notify_keys(
+                    self._clear_optimistic(optimistic.keys(), optimistic)
+                )
+            return None
 
         try:
-            self._writer.write(payload_bytes)
-            await self._writer.drain()
-            _LOGGER.debug("Sent command: %s", packet)
-        except Exception as e:  # noqa: BLE001
-            _LOGGER.error("Failed to send command: %s", e)
+            return await self._send_and_wait(infoType, data, priority, timeout)
+        except CommandError:
+            if optimistic:
+                self._async_notify_keys(
+                    self._clear_optimistic(optimistic.keys(), optimistic)
+                )
+            raise
+
+    async def _send_and_wait(
+        self, infoType: int, data: dict[str, Any], priority: int, timeout: float
+    ) -> Message:
+        """Send a command and return the response to it."""
+        future: asyncio.Future[Message] = self.hass.loop.create_future()
+        self._pending_acks.setdefault(infoType, []).append(future)
+        start = self.hass.loop.time()
+        try:
+            if not await self._send(infoType, data, priority):
+                raise CommandError("Not connected to CN360 server")
+            async with asyncio.timeout(timeout):
+                message = await future
+        except TimeoutError:
+            raise CommandError(
+                f"No response to command {infoType} within {timeout} s"
+            ) from None
+        finally:
+            futures = self._pending_acks.get(infoType, [])
+            if future in futures:
+                futures.remove(future)
+            if not futures:
+                self._pending_acks.pop(infoType, None)
+
+        self._command_rtt = self.hass.loop.time() - start
+        _LOGGER.debug(
+            "Command %s answered in %.0f ms", infoType, self._command_rtt * 1000
+        )
+        if message.errno:
+            raise CommandError(f"Command {infoType} failed with error {message.errno}")
+        return message
+
+    def _resolve_ack(self, message: Message) -> None:
+        """Pass a reply to the oldest command waiting for its infoType.
+
+        The protocol has no sequence ids. Replies are told apart from status
+        pushes by their errno and must come from this robot, not a broadcast.
+        """
+        if (
+            isinstance(message, LocalMessage)
+            or message.info_type is None
+            or message.errno is None
+            or message.sn is None
+            or message.sn != self._serial_number
+        ):
+            return
+        try:
+            info_type = int(message.info_type)
+        except ValueError:
+            return
+        for future in self._pending_acks.get(info_type, ()):
+            if not future.done():
+                future.set_result(message)
+                return
+
+    def _open_coalesce_window(self, key: tuple[int, Any]) -> None:
+        """Hold back further commands for key until the window closes."""
+        self._coalesce_timers[key] = self.hass.loop.call_later(
+            COMMAND_COALESCE_WINDOW, self._close_coalesce_window, key
+        )
+
+    @callback
+    def _close_coalesce_window(self, key: tuple[int, Any]) -> None:
+        """Send the latest command held back for key."""
+        del self._coalesce_timers[key]
+        if (data := self._coalesce_pending.pop(key, None)) is not None:
+            self._open_coalesce_window(key)
+            self.hass.async_create_background_task(
+                self._send(key[0], data, PRIORITY_NORMAL), "CN360-send-command"
+            )
+
+    async def _send(self, infoType: int, data: dict[str, Any], priority: int) -> bool:
+        """Send a command packet through the bridge, False if it was not written."""
+        if not await self._bridge.async_send(
+            encode_command(infoType, self._serial_number, data), priority
+        ):
+            return False
+        _LOGGER.debug("Sent command %s for %s: %s", infoType, self._serial_number, data)
+        return True
+
+    def getCommandQueueDepth(self) -> int:
+        """Return the number of commands waiting to be written."""
+        return self._bridge.getCommandQueueDepth()
+
+    def getCommandRoundTrip(self) -> float | None:
+        """Return the round trip time of the last answered command in seconds."""
+        return self._command_rtt
+
+    def getTrace(self) -> list[TraceEntry]:
+        """Return the recently traced frames of the bridge, oldest first."""
+        return self._bridge.getTrace()
+
+    def getFrameCount(self) -> int:
+        """Return the number of frames the bridge received."""
+        return self._bridge.getFrameCount()
+
+    def getReconnectCount(self) -> int:
+        """Return the number of times the connection was re-established."""
+        return self._bridge.getReconnectCount()
+
+    def getReconnectTime(self) -> float | None:
+        """Return the seconds the last reconnect took, from loss to connected."""
+        return self._bridge.getReconnectTime()
+
+
+class CommandError(HomeAssistantError):
+    """Error to indicate a command was not accepted by the robot."""
+
+
+def _coalesce_key(infoType: int, data: dict[str, Any]) -> tuple[int, Any] | None:
+    """Return the coalesce key of a command, None if it must not be coalesced."""
+    if infoType not in COALESCED_COMMANDS:
+        return None
+    cmds = COALESCED_COMMANDS[infoType]
+    if cmds is None:
+        return (infoType, None)
+    cmd = data.get("cmd")
+    return (infoType, cmd) if cmd in cmds else None
 
 
 async def async_setup_coordinator(
     hass: HomeAssistant, entry: ConfigEntry
 ) -> CN360Coordinator:
-    """Set up the CN360 coordinator."""
-    return CN360Coordinator(hass, entry.data[CONF_IP], entry.data[CONF_PORT])
+    """Set up the CN360 coordinator on the shared bridge connection.
+
+    The state persisted by the last run is restored, a robot without a
+    configured serial number keeps the sn it claimed then.
+    """
+    store: Store[dict[str, Any]] = Store(
+        hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}"
+    )
+    serial_number = entry.data.get(CONF_SERIAL) or None
+    restored = await store.async_load() or {}
+    if restored.get("sn") is None or serial_number not in (None, restored["sn"]):
+        restored = {}
+
+    bridge = async_get_bridge(
+        hass,
+        entry.data[CONF_IP],
+        entry.data[CONF_PORT],
+        entry.options.get(CONF_TRANSPORT, DEFAULT_TRANSPORT),
+        entry.options.get(CONF_TRACE_SAMPLING, DEFAULT_TRACE_SAMPLING),
+    )
+    try:
+        return CN360Coordinator(
+            hass, bridge, serial_number or restored.get("sn"), store, restored
+        )
+    except ValueError as err:
+        # Do not keep the bridge running for a robot that was not added
+        await async_release_bridge(hass, bridge)
+        raise ConfigEntryError(
+            f"Robot {serial_number or restored.get('sn')} is already set up by"
+            " another entry on this CN360 server"
+        ) from err
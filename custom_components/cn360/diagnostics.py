@@ -0,0 +1,65 @@
+"""Diagnostics support for the 360 Robot integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .const import CONF_IP, CONF_SERIAL, DOMAIN
+from .coordinator import CN360Coordinator
+from .models import TraceEntry
+from .protocol import json_loads
+
+TO_REDACT = {CONF_IP, CONF_SERIAL, "sn", "userId"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: CN360Coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    snapshot = coordinator.getSnapshot()
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "robot": {
+            "robot_connected": coordinator.isRobotConnected(),
+            "cloud_connected": coordinator.isCloudConnected(),
+            "generation": snapshot.generation,
+            "changed_paths": sorted(
+                [list(path) for path in snapshot.changed_paths], key=str
+            ),
+            "listeners": coordinator.getListenerCount(),
+            "data": async_redact_data(dict(snapshot.data), TO_REDACT),
+        },
+        "connection": {
+            "frame_count": coordinator.getFrameCount(),
+            "command_queue_depth": coordinator.getCommandQueueDepth(),
+            "command_round_trip": coordinator.getCommandRoundTrip(),
+            "reconnect_count": coordinator.getReconnectCount(),
+            "reconnect_time": coordinator.getReconnectTime(),
+        },
+        "trace": [_trace_entry(entry) for entry in coordinator.getTrace()],
+    }
+
+
+def _trace_entry(entry: TraceEntry) -> dict[str, Any]:
+    """Return a traced frame with its payload decoded and redacted."""
+    try:
+        payload: Any = async_redact_data(json_loads(entry.payload), TO_REDACT)
+    except ValueError:
+        # Truncated or garbled, the raw bytes may contain the serial number
+        payload = None
+    return {
+        "time": dt_util.utc_from_timestamp(entry.time).isoformat(),
+        "direction": entry.direction,
+        "size": entry.size,
+        "payload": payload,
+    }
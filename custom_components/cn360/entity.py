@@ -1,5 +1,9 @@
 """Entity base class."""
 
+from asyncio import Handle
+from collections.abc import Iterable
+from typing import Any
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import Entity
@@ -11,8 +15,20 @@ from .coordinator import CN360Coordinator
 class CN360BaseEntity(Entity):
     """Entity base class."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
-        """Init."""
+    # Updated by the coordinator listeners
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        keys: Iterable[str] | None = None,
+    ) -> None:
+        """Init.
+
+        Only changes of the given robot data keys update the entity, all
+        changes do if no keys are given.
+        """
         self._coordinator: CN360Coordinator = hass.data[DOMAIN][entry.entry_id][
             "coordinator"
         ]
@@ -22,9 +38,45 @@ class CN360BaseEntity(Entity):
             "serial_number": self._coordinator.getSerialNumber(),
             "name": self._coordinator.getSerialNumber(),
         }
+        self._keys = keys
+        self._write_handle: Handle | None = None
+        self._written_state: tuple[Any, ...] | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Listen for robot data changes while the entity is added."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._coordinator.async_add_key_listener(
+                self._handle_coordinator_update, self._keys
+            )
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop a state write that has not run yet."""
+        if self._write_handle is not None:
+            self._write_handle.cancel()
+            self._write_handle = None
+        await super().async_will_remove_from_hass()
+
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated robot data.
 
-        def _update_callback() -> None:
-            """Handle updates from the coordinator."""
-            self.schedule_update_ha_state()
+        Updates arriving in one loop iteration are coalesced into one write.
+        """
+        if self._write_handle is None and self.hass is not None:
+            self._write_handle = self.hass.loop.call_soon(self._async_write_if_changed)
 
-        self._coordinator.async_add_listener(_update_callback)
+    def _async_write_if_changed(self) -> None:
+        """Write the state unless state and attributes equal the last written."""
+        self._write_handle = None
+        state = (
+            self.available,
+            self.state,
+            self.state_attributes,
+            self.extra_state_attributes,
+        )
+        # Tuple comparison tries identity first, cached attributes are cheap
+        if state == self._written_state:
+            return
+        self._written_state = state
+        self.async_write_ha_state()
@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
-import base64
-import io
+import asyncio
+from collections import OrderedDict
+from collections.abc import Mapping
 import logging
-
-from PIL import Image, ImageDraw
+import time
+from typing import Any
 
 from homeassistant.components.image import ImageEntity
 from homeassistant.config_entries import ConfigEntry
@@ -16,23 +17,18 @@ import homeassistant.util.dt as dt_util
 
 from .const import DOMAIN
 from .coordinator import CN360Coordinator
+from .map_render import MapRenderer
 
 _LOGGER = logging.getLogger(__name__)
 
-# Map drawing constants
-MAP_WIDTH = 800
-MAP_HEIGHT = 600
-MAP_MARGIN = 50
-AREA_COLORS = [
-    (106, 90, 205, 150),  # Slate blue (semi-transparent)
-    (238, 130, 238, 150),  # Violet (semi-transparent)
-    (60, 179, 113, 150),  # Medium sea green (semi-transparent)
-    (255, 165, 0, 150),  # Orange (semi-transparent)
-    (70, 130, 180, 150),  # Steel blue (semi-transparent)
-]
-BACKGROUND_COLOR = (240, 240, 240, 255)  # Light gray background
-OUTLINE_COLOR = (50, 50, 50, 255)  # Dark gray outline
-LINE_WIDTH = 2
+# Robot data keys the map is drawn from
+MAP_DATA_KEYS = ("smartArea", "pos", "chargeHandlePos", "phi")
+
+# Number of rendered maps kept in memory
+MAP_RENDER_CACHE_SIZE = 8
+
+# Time spent on the event loop per map update before warning (seconds)
+MAP_LOOP_STALL_WARNING = 0.05
 
 
 async def async_setup_entry(
@@ -61,22 +57,48 @@ class Robot360MapImage(ImageEntity):
         self._entry_id = entry.entry_id
         self._attr_unique_id = f"{self._entry_id}_map"
         self._attr_name = "360 Robot Map"
-        self._image: bytes | None = None
-        self._map_hash: int | None = None
+        # Start with the map persisted by the last run
+        self._image: bytes | None = coordinator.getMapImage()
+        if self._image is not None:
+            self._attr_image_last_updated = dt_util.utcnow()
+        self._map_digest: str | None = None
         self._coordinator = coordinator
 
+        # Rendered PNGs by map digest, least recently used first
+        self._render_cache: OrderedDict[str, bytes] = OrderedDict()
+        self._area_source: Any = None
+        self._area_version = 0
+        self._renderer = MapRenderer()
+
         self._attr_device_info = {
             "identifiers": {(DOMAIN, coordinator.getSerialNumber())},
         }
 
-        def _update_map_data() -> None:
-            """Update the camera image when map data changes."""
-            if "smartArea" in self._coordinator.getRobotData():
-                self._generate_map_image(self._coordinator.getRobotData())
-                self._attr_image_last_updated = dt_util.now()
-                self.schedule_update_ha_state()
+        # Render pipeline state, at most one render runs at a time
+        self._render_task: asyncio.Task[None] | None = None
+        self._pending_render: tuple[str, Mapping[str, Any]] | None = None
 
-        self._coordinator.async_add_listener(_update_map_data)
+    async def async_added_to_hass(self) -> None:
+        """Listen for map data changes while the entity is added."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._coordinator.async_add_key_listener(
+                self._update_map_data, MAP_DATA_KEYS
+            )
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop rendering, a render already in the executor is discarded."""
+        self._pending_render = None
+        if self._render_task is not None:
+            self._render_task.cancel()
+        await super().async_will_remove_from_hass()
+
+    def _update_map_data(self) -> None:
+        """Update the camera image when map data changes."""
+        data = self._coordinator.getRobotData()
+        if "smartArea" in data:
+            self._schedule_render(data)
 
     async def async_update_image_url(self) -> None:
         """Update the image URL if it has changed."""
@@ -92,29 +114,26 @@ class Robot360MapImage(ImageEntity):
         """Return a still image from the camera."""
         try:
             # Access data from coordinator to ensure we have the most current data
-            if not self._coordinator.getRobotData():
+            data = self._coordinator.getRobotData()
+            if not data:
                 _LOGGER.debug("No data available from coordinator")
                 return self._image
 
             # Check if we have map data
-            if "smartArea" not in self._coordinator.getRobotData():
+            if "smartArea" not in data:
                 _LOGGER.debug("No map data available")
                 return self._image
 
-            # Get the current map data
-            map_data = self._coordinator.getRobotData().get("smartArea", {})
-
-            # Calculate a hash value of the map data to detect changes
-            current_hash = hash(str(map_data))
-
             # Only regenerate the image if the map data has changed
-            # if self._map_hash != current_hash or self._image is None or True:
-            self._map_hash = current_hash
-            self._image = await self.hass.async_add_executor_job(
-                self._generate_map_image, map_data
-            )
-            _LOGGER.debug("Generated new map image")
+            self._schedule_render(data)
+            if self._render_task is not None:
+                await asyncio.shield(self._render_task)
 
+            return self._image
+        except asyncio.CancelledError:
+            if (task := asyncio.current_task()) is not None and task.cancelling():
+                raise
+            # The render was cancelled, not this request
             return self._image
         except Exception as err:
             _LOGGER.debug("Error getting camera image: %s", err)
@@ -122,144 +141,115 @@ class Robot360MapImage(ImageEntity):
 
     @property
     def extra_state_attributes(self):
-        return {"data": self._coordinator.getRobotData().get("smartArea", {})}
-
-    def _generate_map_image(self, map_data: dict) -> bytes:
-        """Generate the map image from the map data."""
-        # Create a new image with a white background
-        img = Image.new("RGBA", (MAP_WIDTH, MAP_HEIGHT), BACKGROUND_COLOR)
-        draw = ImageDraw.Draw(img)
-
-        # Get the vertexes from the map data
-        areas = map_data.get("value", [])
-        if not areas:
-            # If no areas, return a blank image
-            buffer = io.BytesIO()
-            img.save(buffer, format="PNG")
-            return buffer.getvalue()
-
-        # Find the bounds of all vertices to center the map
-        all_vertices = []
-        for area in areas:
-            vertices = area.get("vertexs", [])
-            all_vertices.extend(vertices)
-
-        if not all_vertices:
-            # If no vertices, return a blank image
-            buffer = io.BytesIO()
-            img.save(buffer, format="PNG")
-            return buffer.getvalue()
-
-        # Determine min and max x,y values to scale the map properly
-        min_x = min(point[0] for point in all_vertices)
-        max_x = max(point[0] for point in all_vertices)
-        min_y = min(point[1] for point in all_vertices)
-        max_y = max(point[1] for point in all_vertices)
-
-        # Add a little margin
-        min_x = min_x - MAP_MARGIN
-        max_x = max_x + MAP_MARGIN
-        min_y = min_y - MAP_MARGIN
-        max_y = max_y + MAP_MARGIN
-
-        # Calculate scaling factors
-        width = max_x - min_x
-        height = max_y - min_y
-
-        # Avoid division by zero
-        if width == 0:
-            width = 1
-        if height == 0:
-            height = 1
-
-        scale_x = (MAP_WIDTH - 2 * MAP_MARGIN) / width
-        scale_y = (MAP_HEIGHT - 2 * MAP_MARGIN) / height
-
-        # Use the smaller scaling factor to maintain aspect ratio
-        scale = min(scale_x, scale_y)
-
-        # Draw each area with a different color
-        for i, area in enumerate(areas):
-            vertices = area.get("vertexs", [])
-            if not vertices:
-                continue
-
-            # Scale and transform vertices
-            scaled_vertices = []
-            for x, y in vertices:
-                # Flip Y coordinate (PIL uses top-left as origin)
-                # Note: Negating y to flip the coordinate system
-                scaled_x = (x - min_x) * scale + MAP_MARGIN
-                scaled_y = MAP_HEIGHT - ((y - min_y) * scale + MAP_MARGIN)
-                scaled_vertices.append((scaled_x, scaled_y))
-
-            # Get a color for this area (cycle through predefined colors)
-            color = AREA_COLORS[i % len(AREA_COLORS)]
-
-            # Draw the filled polygon
-            draw.polygon(
-                scaled_vertices, fill=color, outline=OUTLINE_COLOR, width=LINE_WIDTH
-            )
+        return {
+            "data": self._coordinator.getRobotData().get("smartArea", {}),
+        }
 
-            # Draw area name if available
-            name = area.get("name", "")
-            if name:
+    def _schedule_render(self, data: Mapping[str, Any]) -> None:
+        """Schedule rendering the map for data unless it is current.
+
+        Renders run in the executor one at a time. Data arriving while a
+        render runs replaces any render still waiting, so only the latest map
+        is drawn.
+        """
+        start = time.perf_counter()
+        digest = self._get_map_digest(data)
+        if digest != self._map_digest:
+            self._map_digest = digest
+            if (image := self._get_cached_image(digest)) is not None:
+                self._pending_render = None
+                self._set_image(image)
+            else:
+                self._pending_render = (digest, data)
+                if self._render_task is None:
+                    self._render_task = self.hass.async_create_background_task(
+                        self._async_render(), f"{self._attr_unique_id} render"
+                    )
+        self._report_loop_time(time.perf_counter() - start)
+
+    async def _async_render(self) -> None:
+        """Render pending maps until none is left."""
+        try:
+            while self._pending_render is not None:
+                digest, data = self._pending_render
+                self._pending_render = None
+                start = time.perf_counter()
                 try:
-                    # Names are base64 encoded
-                    decoded_name = base64.b64decode(name).decode("utf-8")
-
-                    # Find center of the area
-                    center_x = sum(v[0] for v in scaled_vertices) / len(scaled_vertices)
-                    center_y = sum(v[1] for v in scaled_vertices) / len(scaled_vertices)
-
-                    # Draw the text
-                    if area.get("id", -1) in self._coordinator.getRobotData().get(
-                        "smartArea"
-                    ).get("activeIds", []):
-                        draw.text(
-                            (center_x, center_y), decoded_name, fill=(255, 0, 0, 255)
-                        )
-                    else:
-                        draw.text(
-                            (center_x, center_y), decoded_name, fill=(0, 0, 0, 255)
-                        )
-
+                    image = await self.hass.async_add_executor_job(
+                        self._generate_map_image, data
+                    )
                 except Exception:
-                    pass
-
-        timeStr = dt_util.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-        draw.text((10, 10), timeStr, fill=(0, 0, 0, 255))
-
-        # If we have the robot's current position, draw it as a dot
-        pos = self._coordinator.getRobotData().get("pos")
-        if pos and isinstance(pos, list) and len(pos) == 2:
-            try:
-                robot_x, robot_y = pos
-                # Scale and transform position
-                scaled_x = (robot_x - min_x) * scale + MAP_MARGIN
-                scaled_y = MAP_HEIGHT - ((robot_y - min_y) * scale + MAP_MARGIN)
-
-                # Draw a red dot for the robot
-                robot_radius = 5
-                draw.ellipse(
-                    (
-                        scaled_x - robot_radius,
-                        scaled_y - robot_radius,
-                        scaled_x + robot_radius,
-                        scaled_y + robot_radius,
-                    ),
-                    fill=(255, 0, 0, 255),  # Red
-                    outline=(0, 0, 0, 255),  # Black outline
+                    _LOGGER.exception("Error rendering map image")
+                    if digest == self._map_digest:
+                        # Allow the same data to be rendered again
+                        self._map_digest = None
+                    continue
+                _LOGGER.debug(
+                    "Generated new map image in %.1f ms",
+                    (time.perf_counter() - start) * 1000,
                 )
-            except Exception as err:
-                _LOGGER.debug("Error drawing robot position: %s", err)
-
-        # Convert the image to bytes
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
 
-        # print base64 image
-        base64_image = base64.b64encode(buffer.getvalue()).decode("utf-8")
-        _LOGGER.debug("Base64 image: %s", base64_image)
+                loop_start = time.perf_counter()
+                self._cache_image(digest, image)
+                if digest == self._map_digest:
+                    self._set_image(image)
+                self._report_loop_time(time.perf_counter() - loop_start)
+        finally:
+            self._render_task = None
+
+    def _set_image(self, image: bytes) -> None:
+        """Publish a new map image."""
+        self._image = image
+        self._coordinator.setMapImage(image)
+        self._attr_image_last_updated = dt_util.utcnow()
+        self.schedule_update_ha_state()
+
+    def _report_loop_time(self, elapsed: float) -> None:
+        """Warn if a map update blocked the event loop for too long."""
+        if elapsed > MAP_LOOP_STALL_WARNING:
+            _LOGGER.warning(
+                "Map update blocked the event loop for %.1f ms", elapsed * 1000
+            )
 
-        return buffer.getvalue()
+    def _get_map_digest(self, data: Mapping[str, Any]) -> str:
+        """Return a digest of the robot data the map is drawn from.
+
+        merge_data keeps smartArea while its content is unchanged, so a
+        replaced smartArea gets a new version instead of hashing its content
+        on the event loop.
+        """
+        smart_area = data.get("smartArea", {})
+        if smart_area is not self._area_source:
+            self._area_source = smart_area
+            self._area_version += 1
+        return repr(
+            (
+                self._area_version,
+                data.get("pos"),
+                data.get("chargeHandlePos"),
+                data.get("phi"),
+            )
+        )
+
+    def _get_cached_image(self, digest: str) -> bytes | None:
+        """Return a cached rendering for the digest."""
+        image = self._render_cache.get(digest)
+        if image is not None:
+            self._render_cache.move_to_end(digest)
+        return image
+
+    def _cache_image(self, digest: str, image: bytes) -> None:
+        """Store a rendering and evict the least recently used ones."""
+        self._render_cache[digest] = image
+        self._render_cache.move_to_end(digest)
+        while len(self._render_cache) > MAP_RENDER_CACHE_SIZE:
+            self._render_cache.popitem(last=False)
+
+    def _generate_map_image(self, data: Mapping[str, Any]) -> bytes:
+        """Generate the map image from one robot data snapshot."""
+        return self._renderer.render(
+            data.get("smartArea", {}),
+            data.get("pos"),
+            data.get("chargeHandlePos"),
+            data.get("phi"),
+        )
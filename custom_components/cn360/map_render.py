@@ -0,0 +1,454 @@
+"""Map rendering for 360 Robot vacuums.
+
+The rooms are rasterized once into a base layer which is reused until the
+room geometry or the active rooms change. Every room is rasterized into its
+own tile, so only the rooms that changed are drawn again while the scale of
+the map stays the same. Robot and charger markers are drawn on a copy of that
+layer for every frame.
+"""
+
+from __future__ import annotations
+
+import base64
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from functools import cache
+import io
+from itertools import chain
+import math
+from typing import Any
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Map drawing constants
+MAP_WIDTH = 800
+MAP_HEIGHT = 600
+MAP_MARGIN = 50
+AREA_COLORS = [
+    (106, 90, 205, 150),  # Slate blue (semi-transparent)
+    (238, 130, 238, 150),  # Violet (semi-transparent)
+    (60, 179, 113, 150),  # Medium sea green (semi-transparent)
+    (255, 165, 0, 150),  # Orange (semi-transparent)
+    (70, 130, 180, 150),  # Steel blue (semi-transparent)
+]
+BACKGROUND_COLOR = (240, 240, 240, 255)  # Light gray background
+OUTLINE_COLOR = (50, 50, 50, 255)  # Dark gray outline
+LINE_WIDTH = 2
+LABEL_COLOR = (0, 0, 0, 255)
+LABEL_SIZE = 11  # Pixels, if the default font does not tell
+ACTIVE_LABEL_COLOR = (255, 0, 0, 255)
+
+# Overlay drawing constants
+ROBOT_RADIUS = 5
+ROBOT_COLOR = (255, 0, 0, 255)  # Red
+ROBOT_OUTLINE_COLOR = (0, 0, 0, 255)  # Black
+HEADING_LENGTH = 12
+CHARGER_RADIUS = 6
+CHARGER_COLOR = (34, 139, 34, 255)  # Forest green
+
+# Point table marking every pixel with any alpha as covered
+_COVERED = [0] + [255] * 255
+
+
+@dataclass(frozen=True, slots=True)
+class MapTransform:
+    """Transform from robot coordinates to image pixels."""
+
+    min_x: float
+    min_y: float
+    scale: float
+
+    def to_pixel(self, x: float, y: float) -> tuple[float, float]:
+        """Return the pixel for a robot coordinate."""
+        # Flip Y coordinate (PIL uses top-left as origin)
+        return (
+            (x - self.min_x) * self.scale + MAP_MARGIN,
+            MAP_HEIGHT - ((y - self.min_y) * self.scale + MAP_MARGIN),
+        )
+
+
+def encode_png(img: Image.Image) -> bytes:
+    """Encode an image as PNG."""
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@dataclass(frozen=True, slots=True)
+class MapGeometry:
+    """Room polygons packed into contiguous arrays.
+
+    Vertices of all rooms are stored in one (N, 2) array, the rows of room i
+    are vertices[offsets[i]:offsets[i + 1]].
+    """
+
+    vertices: np.ndarray
+    offsets: np.ndarray
+    indexes: tuple[int, ...]
+    ids: tuple[Any, ...]
+    names: tuple[str, ...]
+    areas: tuple[Mapping[str, Any], ...]
+
+    @classmethod
+    def from_areas(cls, areas: Sequence[Mapping[str, Any]]) -> MapGeometry:
+        """Pack the rooms with valid vertices."""
+        rooms = [
+            (i, area, vertices)
+            for i, area in enumerate(areas)
+            if (vertices := area.get("vertexs"))
+        ]
+        counts = [len(vertices) for _, _, vertices in rooms]
+        try:
+            # Fast path, one pass over all coordinates
+            flat = np.fromiter(
+                chain.from_iterable(
+                    chain.from_iterable(vertices for _, _, vertices in rooms)
+                ),
+                dtype=np.float64,
+            )
+        except (TypeError, ValueError):
+            flat = None
+        if flat is None or len(flat) != 2 * sum(counts):
+            return cls._from_rooms_checked(rooms)
+
+        offsets = np.zeros(len(rooms) + 1, dtype=np.intp)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(
+            flat.reshape(-1, 2),
+            offsets,
+            tuple(i for i, _, _ in rooms),
+            tuple(area.get("id", -1) for _, area, _ in rooms),
+            tuple(area.get("name", "") for _, area, _ in rooms),
+            tuple(area for _, area, _ in rooms),
+        )
+
+    @classmethod
+    def _from_rooms_checked(
+        cls, rooms: list[tuple[int, Mapping[str, Any], Any]]
+    ) -> MapGeometry:
+        """Pack rooms one by one, skipping rooms with malformed vertices."""
+        chunks: list[np.ndarray] = []
+        valid = []
+        for i, area, vertices in rooms:
+            try:
+                chunk = np.asarray(vertices, dtype=np.float64)
+            except (TypeError, ValueError):
+                continue
+            if chunk.ndim == 2 and chunk.shape[1] == 2:
+                chunks.append(chunk)
+                valid.append((i, area))
+
+        offsets = np.zeros(len(chunks) + 1, dtype=np.intp)
+        np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+        return cls(
+            np.concatenate(chunks) if chunks else np.empty((0, 2)),
+            offsets,
+            tuple(i for i, _ in valid),
+            tuple(area.get("id", -1) for _, area in valid),
+            tuple(area.get("name", "") for _, area in valid),
+            tuple(area for _, area in valid),
+        )
+
+    def compute_transform(self) -> MapTransform | None:
+        """Return the transform fitting all vertices into the image."""
+        if not len(self.vertices):
+            return None
+
+        # Bounds of all vertices with a little margin
+        min_x, min_y = self.vertices.min(axis=0) - MAP_MARGIN
+        max_x, max_y = self.vertices.max(axis=0) + MAP_MARGIN
+
+        # Avoid division by zero
+        width = (max_x - min_x) or 1
+        height = (max_y - min_y) or 1
+
+        # Use the smaller scaling factor to maintain aspect ratio
+        scale = min(
+            (MAP_WIDTH - 2 * MAP_MARGIN) / width,
+            (MAP_HEIGHT - 2 * MAP_MARGIN) / height,
+        )
+        return MapTransform(float(min_x), float(min_y), float(scale))
+
+    def to_pixels(self, transform: MapTransform) -> np.ndarray:
+        """Return all vertices transformed to pixels."""
+        pixels = (self.vertices - (transform.min_x, transform.min_y)) * transform.scale
+        pixels += MAP_MARGIN
+        # Flip Y coordinate (PIL uses top-left as origin)
+        pixels[:, 1] = MAP_HEIGHT - pixels[:, 1]
+        return pixels
+
+    def centroids(self, pixels: np.ndarray) -> np.ndarray:
+        """Return the vertex mean of every room."""
+        sums = np.add.reduceat(pixels, self.offsets[:-1], axis=0)
+        return sums / np.diff(self.offsets)[:, np.newaxis]
+
+
+@dataclass(frozen=True, slots=True)
+class RoomTile:
+    """One room rasterized on its own, pasted onto the room layer in order."""
+
+    area: Mapping[str, Any]
+    active: bool
+    position: tuple[int, int]
+    image: Image.Image
+    mask: Image.Image
+    label: Image.Image | None = None
+    label_position: tuple[int, int] = (0, 0)
+    label_color: tuple[int, int, int, int] = LABEL_COLOR
+
+
+def draw_rooms(
+    img: Image.Image,
+    geometry: MapGeometry,
+    active_ids: Sequence[int],
+    transform: MapTransform,
+    tiles: Mapping[int, RoomTile] | None = None,
+) -> dict[int, RoomTile]:
+    """Draw the room polygons and names.
+
+    tiles of an earlier draw with the same transform are reused for rooms
+    that did not change. Returns the tiles by room index.
+    """
+    draw = ImageDraw.Draw(img)
+    pixels = geometry.to_pixels(transform)
+    centers = geometry.centroids(pixels).tolist()
+    offsets = geometry.offsets.tolist()
+    drawn: dict[int, RoomTile] = {}
+
+    for room, i in enumerate(geometry.indexes):
+        area = geometry.areas[room]
+        active = geometry.ids[room] in active_ids
+        tile = tiles.get(i) if tiles is not None else None
+        if (
+            tile is None
+            or tile.active != active
+            or not (tile.area is area or tile.area == area)
+        ):
+            tile = draw_room_tile(
+                area,
+                active,
+                # Get a color for this area (cycle through predefined colors)
+                AREA_COLORS[i % len(AREA_COLORS)],
+                pixels[offsets[room] : offsets[room + 1]],
+                geometry.names[room],
+                centers[room],
+            )
+        drawn[i] = tile
+
+        img.paste(tile.image, tile.position, tile.mask)
+        if tile.label is not None:
+            draw.bitmap(tile.label_position, tile.label, fill=tile.label_color)
+    return drawn
+
+
+def draw_room_tile(
+    area: Mapping[str, Any],
+    active: bool,
+    color: tuple[int, int, int, int],
+    pixels: np.ndarray,
+    name: str,
+    center: Sequence[float],
+) -> RoomTile:
+    """Rasterize a room polygon and its name.
+
+    Pasting the tile gives the same pixels as drawing the room on the layer.
+    """
+    pad = LINE_WIDTH + 1
+    left, top = (math.floor(v) - pad for v in pixels.min(axis=0))
+    right, bottom = (math.ceil(v) + pad for v in pixels.max(axis=0))
+    image = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+    ImageDraw.Draw(image).polygon(
+        (pixels - (left, top)).ravel().tolist(),
+        fill=color,
+        outline=OUTLINE_COLOR,
+        width=LINE_WIDTH,
+    )
+    # Polygons replace the pixels they cover, all colors are not transparent
+    mask = image.getchannel("A").point(_COVERED)
+
+    label: Image.Image | None = None
+    label_position = (0, 0)
+    # Draw area name if available
+    if name:
+        try:
+            # Names are base64 encoded
+            decoded_name = base64.b64decode(name).decode("utf-8")
+        except ValueError:
+            pass
+        else:
+            label, label_position = _draw_label(decoded_name, center)
+    return RoomTile(
+        area,
+        active,
+        (left, top),
+        image,
+        mask,
+        label,
+        label_position,
+        ACTIVE_LABEL_COLOR if active else LABEL_COLOR,
+    )
+
+
+def _draw_label(text: str, xy: Sequence[float]) -> tuple[Image.Image, tuple[int, int]]:
+    """Return the coverage of text drawn at xy and where to draw it.
+
+    Drawing the coverage with ImageDraw.bitmap gives the same pixels as
+    ImageDraw.text, the sub-pixel position of xy is kept.
+    """
+    x, y = xy
+    # ImageDraw.text draws at the integer part, offset by the fraction
+    start = (x - int(x), y - int(y))
+    font = _default_font()
+
+    # Measuring costs as much as drawing, so guess a size from the font size
+    # first and only measure if the text reaches the border
+    size = int(getattr(font, "size", LABEL_SIZE))
+    pad = size
+    width = size * (len(text) + 2)
+    height = 3 * size
+    for _ in range(2):
+        label = Image.new("L", (width, height), 0)
+        ImageDraw.Draw(label).text(
+            (start[0] + pad, start[1] + pad), text, fill=255, font=font
+        )
+        bbox = label.getbbox()
+        if bbox is None or (min(bbox[:2]) > 0 and bbox[2] < width and bbox[3] < height):
+            break
+        # The fraction moves the text by less than a pixel
+        left, top, right, bottom = font.getbbox(text)
+        pad = max(0, -math.floor(min(left, top))) + 1
+        width = math.ceil(right) + pad + 2
+        height = math.ceil(bottom) + pad + 2
+    return label, (int(x) - pad, int(y) - pad)
+
+
+@cache
+def _default_font() -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """Return the font ImageDraw uses by default, loaded once."""
+    return ImageFont.load_default()
+
+
+def draw_markers(
+    img: Image.Image,
+    transform: MapTransform,
+    pos: Any,
+    charger_pos: Any,
+    phi: Any,
+) -> None:
+    """Draw the charger and the robot with its heading.
+
+    The heading phi is in radians, counterclockwise from the x axis.
+    """
+    draw = ImageDraw.Draw(img)
+
+    if _is_point(charger_pos):
+        x, y = transform.to_pixel(*charger_pos)
+        draw.rectangle(
+            (
+                x - CHARGER_RADIUS,
+                y - CHARGER_RADIUS,
+                x + CHARGER_RADIUS,
+                y + CHARGER_RADIUS,
+            ),
+            fill=CHARGER_COLOR,
+            outline=ROBOT_OUTLINE_COLOR,
+        )
+
+    if _is_point(pos):
+        x, y = transform.to_pixel(*pos)
+        draw.ellipse(
+            (x - ROBOT_RADIUS, y - ROBOT_RADIUS, x + ROBOT_RADIUS, y + ROBOT_RADIUS),
+            fill=ROBOT_COLOR,
+            outline=ROBOT_OUTLINE_COLOR,
+        )
+        if isinstance(phi, (int, float)):
+            # Image Y axis points down
+            draw.line(
+                (
+                    x,
+                    y,
+                    x + HEADING_LENGTH * math.cos(phi),
+                    y - HEADING_LENGTH * math.sin(phi),
+                ),
+                fill=ROBOT_OUTLINE_COLOR,
+                width=LINE_WIDTH,
+            )
+
+
+def _is_point(value: Any) -> bool:
+    """Return True if value is an [x, y] coordinate."""
+    return (
+        isinstance(value, (list, tuple))
+        and len(value) == 2
+        and all(isinstance(v, (int, float)) for v in value)
+    )
+
+
+class MapRenderer:
+    """Render map images from a cached room layer and per-frame markers.
+
+    Not thread safe, a renderer must only be used by one render at a time.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the renderer."""
+        self._base_areas: Any = None
+        self._geometry: MapGeometry | None = None
+        self._base_active_ids: tuple[int, ...] = ()
+        self._base: Image.Image | None = None
+        self._transform: MapTransform | None = None
+        self._tiles: dict[int, RoomTile] = {}
+
+    def render(
+        self,
+        smart_area: Mapping[str, Any],
+        pos: Any = None,
+        charger_pos: Any = None,
+        phi: Any = None,
+    ) -> bytes:
+        """Render the map as PNG."""
+        base, transform = self._get_base_layer(smart_area)
+        if transform is None:
+            return encode_png(base)
+
+        frame = base.copy()
+        draw_markers(frame, transform, pos, charger_pos, phi)
+        return encode_png(frame)
+
+    def _get_base_layer(
+        self, smart_area: Mapping[str, Any]
+    ) -> tuple[Image.Image, MapTransform | None]:
+        """Return the room layer, drawing it again if the rooms changed.
+
+        The geometry is only built again if the room areas changed. Tiles of
+        unchanged rooms are reused unless the transform changed.
+        """
+        areas = smart_area.get("value", [])
+        active_ids = tuple(smart_area.get("activeIds", []))
+        areas_changed = not (areas is self._base_areas or areas == self._base_areas)
+        if (
+            self._base is None
+            or self._geometry is None
+            or areas_changed
+            or active_ids != self._base_active_ids
+        ):
+            base = Image.new("RGBA", (MAP_WIDTH, MAP_HEIGHT), BACKGROUND_COLOR)
+            if self._geometry is None or areas_changed:
+                self._geometry = MapGeometry.from_areas(areas)
+                transform = self._geometry.compute_transform()
+            else:
+                transform = self._transform
+            if transform is not None:
+                self._tiles = draw_rooms(
+                    base,
+                    self._geometry,
+                    active_ids,
+                    transform,
+                    self._tiles if transform == self._transform else None,
+                )
+            self._base = base
+            self._transform = transform
+            self._base_areas = areas
+            self._base_active_ids = active_ids
+        return self._base, self._transform
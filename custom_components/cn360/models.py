@@ -0,0 +1,138 @@
+"""Data models for the 360 Robot integration."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+
+@dataclass(frozen=True, slots=True)
+class RobotDataSnapshot:
+    """Read-only view of the robot data at one generation.
+
+    A new snapshot is published for every packet that changes the robot data,
+    so holding a reference gives a consistent view without copying.
+    changed_paths holds the paths of the values that changed since the
+    previous snapshot, see merge_data.
+    """
+
+    generation: int
+    data: Mapping[str, Any]
+    changed_paths: frozenset[tuple[Any, ...]] = frozenset()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value for key."""
+        return self.data.get(key, default)
+
+
+EMPTY_SNAPSHOT = RobotDataSnapshot(0, MappingProxyType({}))
+
+
+def merge_data(
+    data: dict[str, Any], update: Mapping[str, Any]
+) -> tuple[dict[str, Any], set[tuple[Any, ...]]]:
+    """Merge a partial update into robot data.
+
+    Nested dicts are merged key by key, a nested key set to None is deleted.
+    Other values replace the old value. Lists of dicts with an id, like the
+    rooms of smartArea, are replaced but keep the old dict of every item that
+    did not change. Unchanged values keep their identity, data itself is
+    returned if nothing changed.
+
+    Returns the merged data and the paths of the changed values, list items
+    are addressed by their id.
+    """
+    changed: set[tuple[Any, ...]] = set()
+    return _merge_dict(data, update, (), changed), changed
+
+
+def _merge_value(
+    old: Any, new: Any, path: tuple[Any, ...], changed: set[tuple[Any, ...]]
+) -> Any:
+    """Return new merged onto old, old itself if nothing changed."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        return _merge_dict(old, new, path, changed)
+    if isinstance(old, list) and isinstance(new, list) and _has_ids(old, new):
+        return _merge_items(old, new, path, changed)
+    if old is new or old == new:
+        return old
+    changed.add(path)
+    return new
+
+
+def _merge_dict(
+    old: dict[str, Any],
+    new: Mapping[str, Any],
+    path: tuple[Any, ...],
+    changed: set[tuple[Any, ...]],
+) -> dict[str, Any]:
+    """Merge the keys of new into a copy of old, made on the first change."""
+    merged: dict[str, Any] | None = None
+    for key, value in new.items():
+        if value is None and path:
+            # Deleted nested key, top level keys keep None as their value
+            if key in old:
+                if merged is None:
+                    merged = dict(old)
+                del merged[key]
+                changed.add((*path, key))
+            continue
+        if key in old:
+            value = _merge_value(old[key], value, (*path, key), changed)
+            if value is old[key]:
+                continue
+        else:
+            changed.add((*path, key))
+        if merged is None:
+            merged = dict(old)
+        merged[key] = value
+    return old if merged is None else merged
+
+
+def _has_ids(*lists: list[Any]) -> bool:
+    """Return True if all items are dicts with an id."""
+    return all(
+        isinstance(item, dict) and isinstance(item.get("id"), (int, str))
+        for items in lists
+        for item in items
+    )
+
+
+def _merge_items(
+    old: list[dict[str, Any]],
+    new: list[dict[str, Any]],
+    path: tuple[Any, ...],
+    changed: set[tuple[Any, ...]],
+) -> list[dict[str, Any]]:
+    """Return the new items, keeping the old dict of unchanged ones."""
+    previous = {item["id"]: item for item in old}
+    found = len(changed)
+    items = []
+    for item in new:
+        before = previous.pop(item["id"], None)
+        if before is not None and (before is item or before == item):
+            items.append(before)
+        else:
+            items.append(item)
+            changed.add((*path, item["id"]))
+    # Removed items
+    changed.update((*path, item_id) for item_id in previous)
+
+    if len(items) == len(old) and all(a is b for a, b in zip(items, old)):
+        return old
+    if len(changed) == found:
+        # Only the order changed
+        changed.add(path)
+    return items
+
+
+@dataclass(frozen=True, slots=True)
+class TraceEntry:
+    """Frame recorded in the packet trace."""
+
+    time: float
+    direction: str  # "rx" or "tx"
+    size: int
+    payload: bytes  # truncated to TRACE_MAX_PAYLOAD
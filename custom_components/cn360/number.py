@@ -31,8 +31,13 @@ async def async_setup_entry(
             hass,
             entry,
             lambda coordinator: (coordinator.getRobotData().get("vol", 0) * 10),
+            ("vol",),
             lambda coordinator, val: (
-                coordinator.sendCommand(21024, {"cmd": "setVolume", "value": val / 10})
+                coordinator.sendCommand(
+                    21024,
+                    {"cmd": "setVolume", "value": val / 10},
+                    optimistic={"vol": val / 10},
+                )
             ),
             "Volume",
             "volume",
@@ -55,6 +60,7 @@ class CN360BaseNumber(CN360BaseEntity, NumberEntity):
         hass: HomeAssistant,
         entry: ConfigEntry,
         getter: Callable[[CN360Coordinator], float],
+        keys: tuple[str, ...],
         action: Callable[[CN360Coordinator, float], None],
         name: str,
         uid: str,
@@ -65,7 +71,7 @@ class CN360BaseNumber(CN360BaseEntity, NumberEntity):
         step: int = 1,
     ) -> None:
         """Init function."""
-        super().__init__(hass, entry)
+        super().__init__(hass, entry, keys)
         self._attr_name = name
         self._attr_unique_id = f"{self._coordinator.getSerialNumber()}_{uid}"
         self._attr_device_class = dev_class
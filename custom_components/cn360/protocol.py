@@ -0,0 +1,274 @@
+"""Protocol of the CN360 bridge.
+
+Frames sent by the bridge start with the sync marker 0x16 0x16, followed by
+the payload length (2 bytes, big endian) and a JSON payload.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+import json
+import logging
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_LOGGER = logging.getLogger(__name__)
+
+FRAME_SYNC = b"\x16\x16"
+FRAME_HEADER_SIZE = 4
+
+# First bytes a JSON payload can start with
+_PAYLOAD_START = frozenset(b"{[ \t\r\n")
+
+
+def json_loads(data: bytes | str) -> Any:
+    """Decode JSON, using orjson if it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Encode JSON as UTF-8, using orjson if it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+@dataclass(frozen=True, slots=True)
+class RobotMessage:
+    """Status or data message sent by a robot."""
+
+    sn: str | None
+    robot_connected: bool | None
+    cloud_connected: bool | None
+    info_type: int | str | None
+    errno: int | None
+    data: dict[str, Any]
+    payload: dict[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class LocalMessage:
+    """Connection state message of the bridge."""
+
+    sn: str | None
+    connected: bool
+    payload: dict[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class ServerMessage:
+    """Message sent by the cloud server."""
+
+    sn: str | None
+    info_type: int | str | None
+    errno: int | None
+    payload: dict[str, Any]
+
+
+Message = RobotMessage | LocalMessage | ServerMessage
+
+
+def decode_message(data: bytes) -> Message | None:
+    """Decode a frame payload, None if its origin is unknown.
+
+    Raises ValueError if the payload is not a JSON object.
+    """
+    payload = json_loads(data)
+    if not isinstance(payload, dict):
+        raise ValueError("Payload is not an object")
+
+    origin = payload.pop("origin", None)
+    if origin == "robot":
+        inner = payload.get("data")
+        if not isinstance(inner, dict):
+            inner = {}
+        if not inner and payload.get("cache"):
+            update = payload["cache"]
+        else:
+            update = inner.get("data") or {}
+        return RobotMessage(
+            payload.get("sn"),
+            payload.get("robot_connected"),
+            payload.get("cloud_connected"),
+            inner.get("infoType"),
+            inner.get("errno"),
+            update,
+            payload,
+        )
+    if origin == "local":
+        return LocalMessage(
+            payload.get("sn"), bool(payload.get("connected", False)), payload
+        )
+    if origin == "server":
+        inner = payload.get("data")
+        if not isinstance(inner, dict):
+            inner = {}
+        return ServerMessage(
+            payload.get("sn"), inner.get("infoType"), inner.get("errno"), payload
+        )
+    _LOGGER.debug("Unknown origin '%s', dropping packet", origin)
+    return None
+
+
+def encode_command(info_type: int, sn: str | None, data: dict[str, Any]) -> bytes:
+    """Encode a command packet, commands are sent without framing."""
+    return json_dumps({"origin": "ha", "infoType": info_type, "sn": sn, "data": data})
+
+
+def encode_frame(payload: bytes) -> bytes:
+    """Return payload framed like the bridge frames it."""
+    return FRAME_SYNC + len(payload).to_bytes(2, "big") + payload
+
+
+class FrameDecoder:
+    """Split a byte stream into frame payloads.
+
+    Bytes can be fed in chunks of any size, complete frames are returned as
+    soon as they are available. Garbage is skipped by searching for the next
+    sync marker, and a marker not followed by a JSON payload is treated as
+    garbage too.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the decoder."""
+        self._buffer = bytearray()
+        self.frames = 0
+        self.discarded = 0
+
+    def feed(self, data: bytes) -> list[bytes]:
+        """Add received bytes and return the payloads of completed frames."""
+        buffer = self._buffer
+        buffer += data
+        size = len(buffer)
+        frames: list[bytes] = []
+        pos = 0
+
+        while True:
+            if buffer[pos : pos + 2] != FRAME_SYNC:
+                start = buffer.find(FRAME_SYNC, pos)
+                if start < 0:
+                    # Keep a trailing first half of the marker
+                    start = size - 1 if buffer.endswith(FRAME_SYNC[:1]) else size
+                    self.discarded += start - pos
+                    pos = start
+                    break
+                self.discarded += start - pos
+                pos = start
+
+            if size - pos < FRAME_HEADER_SIZE:
+                break
+            length = int.from_bytes(buffer[pos + 2 : pos + 4], "big")
+            if not length or (
+                size > pos + FRAME_HEADER_SIZE
+                and buffer[pos + FRAME_HEADER_SIZE] not in _PAYLOAD_START
+            ):
+                # False sync marker, resume the search after it
+                self.discarded += 1
+                pos += 1
+                continue
+
+            end = pos + FRAME_HEADER_SIZE + length
+            if end > size:
+                break
+            frames.append(bytes(buffer[pos + FRAME_HEADER_SIZE : end]))
+            pos = end
+
+        del buffer[:pos]
+        self.frames += len(frames)
+        return frames
+
+
+class FrameProtocol(asyncio.Protocol):
+    """Connection to the bridge dispatching decoded frames from data_received.
+
+    Offers the write(), drain(), is_closing() and get_extra_info() methods of a
+    StreamWriter so it can be used to send commands.
+    """
+
+    def __init__(self, on_frame: Callable[[bytes], None]) -> None:
+        """Initialize the protocol."""
+        self._on_frame = on_frame
+        self.decoder = FrameDecoder()
+        self.transport: asyncio.Transport | None = None
+        self._closed: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._drain_waiter: asyncio.Future[None] | None = None
+        self._paused = False
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Store the transport."""
+        self.transport = transport  # type: ignore[assignment]
+
+    def data_received(self, data: bytes) -> None:
+        """Decode received bytes and dispatch complete frames."""
+        discarded = self.decoder.discarded
+        for payload in self.decoder.feed(data):
+            self._on_frame(payload)
+        if self.decoder.discarded != discarded:
+            _LOGGER.warning(
+                "Skipped %d bytes of unknown data", self.decoder.discarded - discarded
+            )
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        """Resolve waiters once the connection is gone."""
+        if not self._closed.done():
+            if exc is None:
+                self._closed.set_result(None)
+            else:
+                self._closed.set_exception(exc)
+        self._wake_drain_waiter()
+
+    def pause_writing(self) -> None:
+        """Stop draining until the transport buffer is flushed."""
+        self._paused = True
+
+    def resume_writing(self) -> None:
+        """Release drain() callers."""
+        self._paused = False
+        self._wake_drain_waiter()
+
+    def _wake_drain_waiter(self) -> None:
+        """Release a waiting drain() call."""
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            self._drain_waiter.set_result(None)
+        self._drain_waiter = None
+
+    def write(self, data: bytes) -> None:
+        """Write data to the transport."""
+        if self.transport is None:
+            raise ConnectionResetError("Not connected")
+        self.transport.write(data)
+
+    def is_closing(self) -> bool:
+        """Return True if the connection is closing or closed."""
+        return self.transport is None or self.transport.is_closing()
+
+    async def drain(self) -> None:
+        """Wait until the transport buffer has room again."""
+        if self.is_closing():
+            raise ConnectionResetError("Connection lost")
+        if self._paused:
+            self._drain_waiter = asyncio.get_running_loop().create_future()
+            await self._drain_waiter
+
+    def get_extra_info(self, name: str, default: Any = None) -> Any:
+        """Return transport information, like the socket."""
+        if self.transport is None:
+            return default
+        return self.transport.get_extra_info(name, default)
+
+    def close(self) -> None:
+        """Close the connection."""
+        if self.transport is not None:
+            self.transport.close()
+
+    async def wait_closed(self) -> None:
+        """Wait until the connection is lost."""
+        await asyncio.shield(self._closed)
@@ -24,9 +24,12 @@ async def async_setup_entry(
             hass,
             entry,
             lambda coordinator: (coordinator.getRobotData().get("led", 0) == 1),
+            ("led",),
             lambda coordinator, val: (
                 coordinator.sendCommand(
-                    21024, {"cmd": "setledswitch", "value": 1 if val else 0}
+                    21024,
+                    {"cmd": "setledswitch", "value": 1 if val else 0},
+                    optimistic={"led": 1 if val else 0},
                 )
             ),
             "LED",
@@ -38,9 +41,12 @@ async def async_setup_entry(
             hass,
             entry,
             lambda coordinator: (coordinator.getRobotData().get("soft", 0) == 1),
+            ("soft",),
             lambda coordinator, val: (
                 coordinator.sendCommand(
-                    21024, {"cmd": "setSoftAlongWall", "value": 1 if val else 0}
+                    21024,
+                    {"cmd": "setSoftAlongWall", "value": 1 if val else 0},
+                    optimistic={"soft": 1 if val else 0},
                 )
             ),
             "Collision prevention",
@@ -52,9 +58,12 @@ async def async_setup_entry(
             hass,
             entry,
             lambda coordinator: (coordinator.getRobotData().get("autoBoost", 0) == 1),
+            ("autoBoost",),
             lambda coordinator, val: (
                 coordinator.sendCommand(
-                    21024, {"cmd": "setAutoBoost", "value": 1 if val else 0}
+                    21024,
+                    {"cmd": "setAutoBoost", "value": 1 if val else 0},
+                    optimistic={"autoBoost": 1 if val else 0},
                 )
             ),
             "Carpet auto boost",
@@ -75,6 +84,7 @@ class CN360BaseSwitch(CN360BaseEntity, SwitchEntity):
         hass: HomeAssistant,
         entry: ConfigEntry,
         getter: Callable[[CN360Coordinator], bool],
+        keys: tuple[str, ...],
         action: Callable[[CN360Coordinator, bool], None],
         name: str,
         uid: str,
@@ -82,7 +92,7 @@ class CN360BaseSwitch(CN360BaseEntity, SwitchEntity):
         category: EntityCategory | None = None,
     ) -> None:
         """Init function."""
-        super().__init__(hass, entry)
+        super().__init__(hass, entry, keys)
         self._attr_name = name
         self._attr_unique_id = f"{self._coordinator.getSerialNumber()}_{uid}"
         self._attr_device_class = dev_class
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from collections.abc import Mapping
+from functools import cache
 import json
 import logging
 from typing import Any
@@ -32,6 +33,9 @@ ACTIVITY_MAPPING = {
     "sweep": VacuumActivity.CLEANING,
 }
 
+# Placeholder for robot data keys that are not set
+_MISSING = object()
+
 FAN_SPEEDS = [
     "quiet",
     "auto",
@@ -39,6 +43,48 @@ FAN_SPEEDS = [
     "max",
 ]
 
+# Robot data keys read by the vacuum state and attributes
+VACUUM_DATA_KEYS = (
+    "allArea",
+    "allTime",
+    "area",
+    "autoBoost",
+    "chargeHandlePhi",
+    "chargeHandlePos",
+    "chargeHandleState",
+    "cleanArea",
+    "cleanId",
+    "cleanId2",
+    "cleanTime",
+    "elec",
+    "elecReal",
+    "errorState",
+    "errorTime",
+    "height",
+    "lastSubMode",
+    "led",
+    "mapId",
+    "mode",
+    "mopStatus",
+    "pathId",
+    "phi",
+    "pos",
+    "reliable",
+    "resolution",
+    "showSmartArea",
+    "showSweepArea",
+    "soft",
+    "subMode",
+    "timerStatus",
+    "volume",
+    "water",
+    "width",
+    "windPower",
+    "workNoisy",
+    "x_min",
+    "y_min",
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -51,26 +97,99 @@ async def async_setup_entry(
     async_add_entities([vacuum])
 
 
+def _build_attributes(
+    data: Mapping[str, Any], area: str, error_state: str
+) -> dict[str, Any]:
+    """Build the vacuum state attributes from the robot data.
+
+    area and error_state are the JSON of the area and errorState values.
+    """
+    return {
+        "Total area cleaned (m2)": data.get("allArea", 0),
+        "Total time cleaned (min)": data.get("allTime", 0),
+        "Area": area,
+        "Auto Boost": "On" if data.get("autoBoost", 0) == 1 else "Off",
+        "Charge Handle Phi": data.get("chargeHandlePhi", 0),
+        "Charge Handle Position X": data.get("chargeHandlePos", [0, 0])[0],
+        "Charge Handle Position Y": data.get("chargeHandlePos", [0, 0])[1],
+        "Charge Handle State": data.get("chargeHandleState", 0),
+        "Clean Area": data.get("cleanArea", 0),
+        "Clean ID": data.get("cleanId", "None"),
+        "Clean ID 2": data.get("cleanId2", "None"),
+        "Clean Time": data.get("cleanTime", 0),
+        "Battery Percentage": data.get("elec", 0),
+        "Real Battery Percentage": data.get("elecReal", 0),
+        "Error State": error_state,
+        "Error Time": data.get("errorTime", 0),
+        "Height": data.get("height", 0),
+        "Last Sub Mode": data.get("lastSubMode", 0),  # null, total, smart
+        "LED": "On" if data.get("led", 0) == 1 else "Off",
+        "Map ID": data.get("mapId", 0),
+        # backcharge, charge, fullcharge, idle, rfctrl, sweep
+        "Mode": data.get("mode", 0),
+        "Mop status": "On" if data.get("mopStatus", 0) == 1 else "Off",
+        "Path ID": data.get("pathId", 0),
+        "Phi": data.get("phi", 0),
+        "Position X": data.get("pos", [0, 0])[0],
+        "Position Y": data.get("pos", [0, 0])[1],
+        "Reliable": data.get("reliable", 0),
+        "Resolution": data.get("resolution", 0),
+        "Show smart area": "On" if data.get("showSmartArea", 0) == 1 else "Off",
+        "Show sweep area": "On" if data.get("showSweepArea", 0) == 1 else "Off",
+        "Soft": "On" if data.get("soft", 0) == 1 else "Off",
+        "Sub Mode": data.get("subMode", 0),
+        "Timer Status": data.get("timerStatus", 0),
+        "Volume": data.get("volume", 0),
+        "Water": data.get("water", 0),
+        "Width": data.get("width", 0),
+        "Wind Power": data.get("windPower", 0),
+        "Fan (Work Noisy)": data.get("workNoisy", 0),
+        "x min": data.get("x_min", 0),
+        "y min": data.get("y_min", 0),
+    }
+
+
+@cache
+def _supported_features(activity: VacuumActivity) -> VacuumEntityFeature:
+    """Return the features supported in an activity."""
+    return (
+        (VacuumEntityFeature.PAUSE if activity == VacuumActivity.CLEANING else 0)
+        | (
+            VacuumEntityFeature.START
+            if activity
+            in [VacuumActivity.PAUSED, VacuumActivity.DOCKED, VacuumActivity.IDLE]
+            else 0
+        )
+        | (
+            VacuumEntityFeature.RETURN_HOME
+            if activity not in [VacuumActivity.DOCKED, VacuumActivity.RETURNING]
+            else 0
+        )
+        | (VacuumEntityFeature.STOP if activity == VacuumActivity.RETURNING else 0)
+        | VacuumEntityFeature.STATUS
+        | VacuumEntityFeature.BATTERY
+        | VacuumEntityFeature.FAN_SPEED
+    )
+
+
 class CN360Vacuum(CN360BaseEntity, StateVacuumEntity):
     """Representation of a 360 Robot vacuum cleaner."""
 
     _attr_fan_speed_list = FAN_SPEEDS
-    _attr_should_poll = False
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the 360 Robot vacuum."""
-        super().__init__(hass, entry)
+        super().__init__(hass, entry, VACUUM_DATA_KEYS)
         self.hass = hass
         self._entry_id = entry.entry_id
         self._attr_unique_id = entry.entry_id
         self._attr_name = "360 Robot"
 
-        def _update_callback() -> None:
-            """Handle updates from the coordinator."""
-            self.schedule_update_ha_state()
-
-        # when coordinator updates it data
-        self._coordinator.async_add_listener(_update_callback)
+        # JSON of robot data values by key, with the value it was dumped from
+        self._dumped: dict[str, tuple[Any, str]] = {}
+        self._attributes: dict[str, Any] = self._build_attributes({})
+        self._attributes_generation = 0
+        self._attributes_sources: tuple[Any, ...] = (None,) * len(VACUUM_DATA_KEYS)
 
     @property
     def activity(self) -> VacuumActivity:
@@ -90,87 +209,50 @@ class CN360Vacuum(CN360BaseEntity, StateVacuumEntity):
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any]:
-        """Return device specific state attributes."""
-        return {
-            "Total area cleaned (m2)": self._coordinator.getRobotData().get(
-                "allArea", 0
-            ),
-            "Total time cleaned (min)": self._coordinator.getRobotData().get(
-                "allTime", 0
-            ),
-            "Area": json.dumps(
-                self._coordinator.getRobotData().get("area", {}), indent=2
-            ),
-            "Auto Boost": "On"
-            if self._coordinator.getRobotData().get("autoBoost", 0) == 1
-            else "Off",
-            "Charge Handle Phi": self._coordinator.getRobotData().get(
-                "chargeHandlePhi", 0
-            ),
-            "Charge Handle Position X": self._coordinator.getRobotData().get(
-                "chargeHandlePos", [0, 0]
-            )[0],
-            "Charge Handle Position Y": self._coordinator.getRobotData().get(
-                "chargeHandlePos", [0, 0]
-            )[1],
-            "Charge Handle State": self._coordinator.getRobotData().get(
-                "chargeHandleState", 0
-            ),
-            "Clean Area": self._coordinator.getRobotData().get("cleanArea", 0),
-            "Clean ID": self._coordinator.getRobotData().get("cleanId", "None"),
-            "Clean ID 2": self._coordinator.getRobotData().get("cleanId2", "None"),
-            "Clean Time": self._coordinator.getRobotData().get("cleanTime", 0),
-            "Battery Percentage": self._coordinator.getRobotData().get("elec", 0),
-            "Real Battery Percentage": self._coordinator.getRobotData().get(
-                "elecReal", 0
-            ),
-            "Error State": json.dumps(
-                self._coordinator.getRobotData().get("errorState", [0])
-            ),
-            "Error Time": self._coordinator.getRobotData().get("errorTime", 0),
-            "Height": self._coordinator.getRobotData().get("height", 0),
-            "Last Sub Mode": self._coordinator.getRobotData().get(
-                "lastSubMode", 0
-            ),  # null, total, smart
-            "LED": "On"
-            if self._coordinator.getRobotData().get("led", 0) == 1
-            else "Off",
-            "Map ID": self._coordinator.getRobotData().get("mapId", 0),
-            "Mode": self._coordinator.getRobotData().get(
-                "mode", 0
-            ),  # backcharge, charge, fullcharge, idle, rfctrl, sweep
-            "Mop status": "On"
-            if self._coordinator.getRobotData().get("mopStatus", 0) == 1
-            else "Off",
-            "Path ID": self._coordinator.getRobotData().get("pathId", 0),
-            "Phi": self._coordinator.getRobotData().get("phi", 0),
-            "Position X": self._coordinator.getRobotData().get("pos", [0, 0])[0],
-            "Position Y": self._coordinator.getRobotData().get("pos", [0, 0])[1],
-            "Reliable": self._coordinator.getRobotData().get("reliable", 0),
-            "Resolution": self._coordinator.getRobotData().get("resolution", 0),
-            "Show smart area": "On"
-            if self._coordinator.getRobotData().get("showSmartArea", 0) == 1
-            else "Off",
-            "Show sweep area": "On"
-            if self._coordinator.getRobotData().get("showSweepArea", 0) == 1
-            else "Off",
-            "Soft": "On"
-            if self._coordinator.getRobotData().get("soft", 0) == 1
-            else "Off",
-            "Sub Mode": self._coordinator.getRobotData().get("subMode", 0),
-            "Timer Status": self._coordinator.getRobotData().get("timerStatus", 0),
-            "Volume": self._coordinator.getRobotData().get("volume", 0),
-            "Water": self._coordinator.getRobotData().get("water", 0),
-            "Width": self._coordinator.getRobotData().get("width", 0),
-            "Wind Power": self._coordinator.getRobotData().get("windPower", 0),
-            "Fan (Work Noisy)": self._coordinator.getRobotData().get("workNoisy", 0),
-            "x min": self._coordinator.getRobotData().get("x_min", 0),
-            "y min": self._coordinator.getRobotData().get("y_min", 0),
-        }
+        """Return device specific state attributes.
+
+        The bundle is rebuilt at most once per data generation and only if one
+        of its source values was replaced.
+        """
+        snapshot = self._coordinator.getSnapshot()
+        if snapshot.generation != self._attributes_generation:
+            self._attributes_generation = snapshot.generation
+            sources = tuple(snapshot.data.get(key) for key in VACUUM_DATA_KEYS)
+            if any(
+                new is not old
+                for new, old in zip(sources, self._attributes_sources, strict=True)
+            ):
+                self._attributes = self._build_attributes(snapshot.data)
+                self._attributes_sources = sources
+        return self._attributes
+
+    def _build_attributes(self, data: Mapping[str, Any]) -> dict[str, Any]:
+        """Build the attributes, only dumping replaced values to JSON again."""
+        return _build_attributes(
+            data,
+            self._dump_json(data, "area", {}, indent=2),
+            self._dump_json(data, "errorState", [0]),
+        )
+
+    def _dump_json(
+        self, data: Mapping[str, Any], key: str, default: Any, indent: int | None = None
+    ) -> str:
+        """Return the JSON of a robot data value, reused until it is replaced."""
+        value = data.get(key, _MISSING)
+        dumped = self._dumped.get(key)
+        if dumped is None or dumped[0] is not value:
+            dumped = (
+                value,
+                json.dumps(default if value is _MISSING else value, indent=indent),
+            )
+            self._dumped[key] = dumped
+        return dumped[1]
 
     async def async_pause(self, **kwargs: Any) -> None:
         """Pause the cleaning cycle."""
-        await self._coordinator.sendCommand(21017, {"cmd": "pause"})
+        await self._coordinator.sendCommand(
+            21017, {"cmd": "pause"}, optimistic={"mode": "pause"}
+        )
 
     async def async_stop(self, **kwargs):
         """Stop returning to dock."""
@@ -179,51 +261,31 @@ class CN360Vacuum(CN360BaseEntity, StateVacuumEntity):
     async def async_start(self, **kwargs: Any) -> None:
         """Resume the cleaning cycle."""
         await self._coordinator.sendCommand(
-            21005, {"mode": "smartClean", "globalCleanTimes": 1}
+            21005,
+            {"mode": "smartClean", "globalCleanTimes": 1},
+            optimistic={"mode": "sweep"},
         )
 
     async def async_return_to_base(self, **kwargs: Any) -> None:
         """Set the vacuum cleaner to return to the dock."""
-        await self._coordinator.sendCommand(21012, {"cmd": "start"})
+        await self._coordinator.sendCommand(
+            21012, {"cmd": "start"}, optimistic={"mode": "backcharge"}
+        )
 
     async def async_set_fan_speed(self, fan_speed: str, **kwargs: Any) -> None:
         """Set fan speed."""
         if fan_speed not in FAN_SPEEDS:
             raise FanModeNotSupportedException(f"Fan speed {fan_speed} not available")
         await self._coordinator.sendCommand(
-            21022, {"cmd": fan_speed, "cleanType": "total"}
+            21022,
+            {"cmd": fan_speed, "cleanType": "total"},
+            optimistic={"workNoisy": fan_speed},
         )
 
     @property
     def supported_features(self) -> VacuumEntityFeature:
         """Supported features."""
-        return (
-            (
-                VacuumEntityFeature.PAUSE
-                if self.activity == VacuumActivity.CLEANING
-                else 0
-            )
-            | (
-                VacuumEntityFeature.START
-                if self.activity
-                in [VacuumActivity.PAUSED, VacuumActivity.DOCKED, VacuumActivity.IDLE]
-                else 0
-            )
-            | (
-                VacuumEntityFeature.RETURN_HOME
-                if self.activity
-                not in [VacuumActivity.DOCKED, VacuumActivity.RETURNING]
-                else 0
-            )
-            | (
-                VacuumEntityFeature.STOP
-                if self.activity == VacuumActivity.RETURNING
-                else 0
-            )
-            | VacuumEntityFeature.STATUS
-            | VacuumEntityFeature.BATTERY
-            | VacuumEntityFeature.FAN_SPEED
-        )
+        return _supported_features(self.activity)
 
 
 class FanModeNotSupportedException(HomeAssistantError):
@@ -0,0 +1,92 @@
+"""Fixtures for the tests of the integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Coroutine
+import importlib.util
+from pathlib import Path
+import sys
+from types import ModuleType, SimpleNamespace
+from typing import Any
+
+import pytest
+
+REPO_DIR = Path(__file__).parent.parent
+COMPONENT_DIR = REPO_DIR / "custom_components" / "cn360"
+
+# Tests of the bridge and coordinator import the integration package
+sys.path.insert(0, str(REPO_DIR))
+
+
+class FakeConfigEntries:
+    """Config entries of the integration, as entry data."""
+
+    def __init__(self) -> None:
+        """Initialize without entries."""
+        self.entries: list[Any] = []
+
+    def add(self, data: dict[str, Any]) -> None:
+        """Add an entry with data."""
+        self.entries.append(SimpleNamespace(data=data))
+
+    def async_entries(self, domain: str) -> list[Any]:
+        """Return the entries."""
+        return self.entries
+
+
+class FakeHass:
+    """The parts of HomeAssistant the bridge and coordinator use."""
+
+    def __init__(self) -> None:
+        """Initialize on the running loop."""
+        self.loop = asyncio.get_running_loop()
+        self.data: dict[str, Any] = {}
+        self.config_entries = FakeConfigEntries()
+
+    def async_create_background_task(
+        self, target: Coroutine[Any, Any, Any], name: str, eager_start: bool = True
+    ) -> asyncio.Task[Any]:
+        """Run a coroutine as a task."""
+        return self.loop.create_task(target, name=name)
+
+    def async_create_task(
+        self, target: Coroutine[Any, Any, Any], name: str | None = None
+    ) -> asyncio.Task[Any]:
+        """Run a coroutine as a task."""
+        return self.loop.create_task(target, name=name)
+
+
+def _load_module(name: str) -> ModuleType:
+    """Load a module of the integration that does not need Home Assistant."""
+    spec = importlib.util.spec_from_file_location(
+        f"cn360_{name}", COMPONENT_DIR / f"{name}.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def protocol() -> ModuleType:
+    """Return the protocol module."""
+    return _load_module("protocol")
+
+
+@pytest.fixture(scope="session")
+def models() -> ModuleType:
+    """Return the models module."""
+    return _load_module("models")
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    """Run async tests on asyncio, like Home Assistant."""
+    return "asyncio"
+
+
+@pytest.fixture
+async def hass() -> FakeHass:
+    """Return a fake Home Assistant on the running loop."""
+    return FakeHass()
@@ -0,0 +1,230 @@
+"""Tests for the shared bridge connection."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.cn360 import bridge as bridge_module  # noqa: E402
+from custom_components.cn360.bridge import CN360Bridge  # noqa: E402
+from custom_components.cn360.const import (  # noqa: E402
+    CONF_SERIAL,
+    PRIORITY_NORMAL,
+    PRIORITY_REFRESH,
+    PRIORITY_SAFETY,
+)
+from custom_components.cn360.coordinator import CN360Coordinator  # noqa: E402
+from custom_components.cn360.protocol import json_dumps  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeTransport:
+    """Transport recording how it was closed."""
+
+    def __init__(self) -> None:
+        """Initialize open."""
+        self.aborted = False
+
+    def abort(self) -> None:
+        """Close without flushing."""
+        self.aborted = True
+
+
+class FakeWriter:
+    """Writer recording packets, drain blocks while the buffer is full."""
+
+    def __init__(self) -> None:
+        """Initialize with room in the buffer."""
+        self.transport = FakeTransport()
+        self.packets: list[bytes] = []
+        self.drains = 0
+        self.room = asyncio.Event()
+        self.room.set()
+
+    def write(self, data: bytes) -> None:
+        """Record a packet."""
+        self.packets.append(data)
+
+    async def drain(self) -> None:
+        """Wait for room in the buffer."""
+        self.drains += 1
+        await self.room.wait()
+
+    def is_closing(self) -> bool:
+        """Return True once aborted."""
+        return self.transport.aborted
+
+    def close(self) -> None:
+        """Close the writer."""
+
+    def get_extra_info(self, name: str, default: Any = None) -> Any:
+        """Return no socket."""
+        return default
+
+
+def _robot_frame(sn: str, data: dict[str, Any]) -> bytes:
+    """Return the payload of a status frame of a robot."""
+    return json_dumps(
+        {"origin": "robot", "sn": sn, "data": {"infoType": 20001, "data": data}}
+    )
+
+
+async def _connect(hass: Any) -> tuple[CN360Bridge, FakeWriter]:
+    """Return a bridge connected to a fake writer."""
+    bridge = CN360Bridge(hass, "127.0.0.1", 1, "stream", 0)
+    writer = FakeWriter()
+    bridge._set_connected(writer)
+    return bridge, writer
+
+
+async def _blocked(bridge: CN360Bridge, writer: FakeWriter) -> asyncio.Task[bool]:
+    """Send a command and keep the writer task draining it."""
+    writer.room.clear()
+    send = asyncio.create_task(bridge.async_send(b"first", PRIORITY_REFRESH))
+    while not writer.drains:
+        await asyncio.sleep(0)
+    return send
+
+
+async def test_commands_in_priority_order(hass: Any) -> None:
+    """Queued commands are written by priority and drained once per batch."""
+    bridge, writer = await _connect(hass)
+    first = await _blocked(bridge, writer)
+    sends = [
+        asyncio.create_task(bridge.async_send(packet, priority))
+        for packet, priority in (
+            (b"refresh", PRIORITY_REFRESH),
+            (b"normal", PRIORITY_NORMAL),
+            (b"safety", PRIORITY_SAFETY),
+            (b"normal2", PRIORITY_NORMAL),
+        )
+    ]
+    await asyncio.sleep(0)
+    assert bridge.getCommandQueueDepth() == 4
+
+    writer.room.set()
+    assert await first
+    assert await asyncio.gather(*sends) == [True] * 4
+    assert writer.packets == [b"first", b"safety", b"normal", b"normal2", b"refresh"]
+    assert writer.drains == 2
+    bridge._set_disconnected()
+
+
+async def test_full_queue_waits(hass: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Senders wait while the queue is full."""
+    monkeypatch.setattr(bridge_module, "COMMAND_QUEUE_SIZE", 2)
+    bridge, writer = await _connect(hass)
+    first = await _blocked(bridge, writer)
+    sends = [
+        asyncio.create_task(bridge.async_send(b"{}", PRIORITY_NORMAL)) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    assert bridge.getCommandQueueDepth() == 2
+    assert not any(send.done() for send in sends)
+
+    writer.room.set()
+    assert await first
+    assert await asyncio.gather(*sends) == [True] * 3
+    assert len(writer.packets) == 4
+    bridge._set_disconnected()
+
+
+async def test_commands_dropped_on_disconnect(hass: Any) -> None:
+    """Commands not written when the connection is lost report False."""
+    bridge, writer = await _connect(hass)
+    first = await _blocked(bridge, writer)
+    queued = asyncio.create_task(bridge.async_send(b"queued", PRIORITY_NORMAL))
+    await asyncio.sleep(0)
+
+    bridge._set_disconnected()
+    assert await first is False
+    assert await queued is False
+    assert bridge.getCommandQueueDepth() == 0
+    assert await bridge.async_send(b"late", PRIORITY_NORMAL) is False
+
+
+async def test_probe_stuck_in_full_buffer(
+    hass: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A silent connection whose probe cannot be written is aborted."""
+    monkeypatch.setattr(bridge_module, "READ_IDLE_TIMEOUT", 0.01)
+    monkeypatch.setattr(bridge_module, "READ_PROBE_TIMEOUT", 0.05)
+    bridge, writer = await _connect(hass)
+    writer.room.clear()
+    send = asyncio.create_task(bridge.async_send(b"{}", PRIORITY_REFRESH))
+
+    async with asyncio.timeout(1):
+        await bridge._watchdog_task
+    assert writer.transport.aborted
+
+    bridge._set_disconnected()
+    assert await send is False
+
+
+async def test_frames_routed_by_sn(hass: Any) -> None:
+    """Frames go to the robot of their sn, frames without one to all robots."""
+    bridge = CN360Bridge(hass, "127.0.0.1", 1, "stream", 0)
+    robot1 = CN360Coordinator(hass, bridge, "robot1")
+    robot2 = CN360Coordinator(hass, bridge, "robot2")
+
+    bridge._handle_frame(_robot_frame("robot1", {"elec": 10}))
+    bridge._handle_frame(_robot_frame("robot2", {"elec": 20}))
+    bridge._handle_frame(_robot_frame("robot3", {"elec": 30}))
+    bridge._handle_frame(
+        json_dumps({"origin": "robot", "data": {"infoType": 1, "data": {"led": 1}}})
+    )
+
+    assert robot1.getRobotData() == {"elec": 10, "led": 1}
+    assert robot2.getRobotData() == {"elec": 20, "led": 1}
+    with pytest.raises(ValueError):
+        CN360Coordinator(hass, bridge, "robot1")
+
+
+async def test_unbound_robot_claims_sn(hass: Any) -> None:
+    """A robot without sn claims the first unknown sn and keeps it."""
+    bridge = CN360Bridge(hass, "127.0.0.1", 1, "stream", 0)
+    robot1 = CN360Coordinator(hass, bridge, "robot1")
+    robot = CN360Coordinator(hass, bridge, None)
+
+    bridge._handle_frame(_robot_frame("robot1", {"elec": 10}))
+    assert robot.getSerialNumber() is None
+
+    bridge._handle_frame(_robot_frame("robot2", {"elec": 20}))
+    bridge._handle_frame(_robot_frame("robot3", {"elec": 30}))
+    assert robot.getSerialNumber() == "robot2"
+    assert robot.getRobotData()["elec"] == 20
+    assert robot1.getRobotData()["elec"] == 10
+
+
+async def test_claim_skips_configured_serials(hass: Any) -> None:
+    """A robot without sn does not claim one configured in another entry."""
+    hass.config_entries.add({CONF_SERIAL: "robot2"})
+    bridge = CN360Bridge(hass, "127.0.0.1", 1, "stream", 0)
+    robot = CN360Coordinator(hass, bridge, None)
+
+    bridge._handle_frame(_robot_frame("robot2", {"elec": 50}))
+    assert robot.getSerialNumber() is None
+    assert not robot.getRobotData()
+
+    bridge._handle_frame(_robot_frame("robot1", {"elec": 80}))
+    assert robot.getSerialNumber() == "robot1"
+    assert robot.getRobotData()["elec"] == 80
+
+
+async def test_options_of_shared_bridge(
+    hass: Any, caplog: pytest.LogCaptureFixture
+) -> None:
+    """An entry sharing a bridge gets it with the options it was started with."""
+    bridge = bridge_module.async_get_bridge(hass, "127.0.0.1", 1, "stream", 0)
+    try:
+        shared = bridge_module.async_get_bridge(hass, "127.0.0.1", 1, "protocol", 10)
+        assert shared is bridge
+        assert (bridge.getTransport(), bridge.getTraceSampling()) == ("stream", 0)
+        assert "keeping its stream transport" in caplog.text
+    finally:
+        await bridge.async_disconnect()
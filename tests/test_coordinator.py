@@ -0,0 +1,231 @@
+"""Tests for the robot coordinator."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.cn360 import coordinator as coordinator_module  # noqa: E402
+from custom_components.cn360.coordinator import (  # noqa: E402
+    CN360Coordinator,
+    CommandError,
+)
+from custom_components.cn360.protocol import RobotMessage, json_loads  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+SN = "robot1"
+
+
+class FakeBridge:
+    """Bridge recording the commands sent through it."""
+
+    def __init__(self) -> None:
+        """Initialize connected."""
+        self.sent: list[dict[str, Any]] = []
+        self.connected = True
+
+    def async_add_robot(self, robot: CN360Coordinator) -> Any:
+        """Accept the robot."""
+        return lambda: None
+
+    async def async_send(self, packet: bytes, priority: int) -> bool:
+        """Record the command, False if not connected."""
+        if self.connected:
+            self.sent.append(json_loads(packet))
+        return self.connected
+
+
+def _reply(info_type: int, errno: int | None = 0, sn: str | None = SN) -> RobotMessage:
+    """Return a robot message answering a command."""
+    return RobotMessage(sn, True, True, info_type, errno, {}, {})
+
+
+async def _sent(bridge: FakeBridge, count: int = 1) -> None:
+    """Wait until count commands were sent."""
+    while len(bridge.sent) < count:
+        await asyncio.sleep(0)
+
+
+async def test_wait_for_reply(hass: Any) -> None:
+    """A waiting command returns the reply of its robot and records the RTT."""
+    bridge = FakeBridge()
+    coordinator = CN360Coordinator(hass, bridge, SN)
+    task = asyncio.create_task(coordinator.sendCommand(21014, {}, wait=True))
+    await _sent(bridge)
+
+    # Status pushes and replies of other robots are not replies
+    coordinator.async_handle_message(_reply(21014, errno=None))
+    coordinator.async_handle_message(_reply(21014, sn="robot2"))
+    await asyncio.sleep(0)
+    assert not task.done()
+
+    reply = _reply(21014)
+    coordinator.async_handle_message(reply)
+    assert await task is reply
+    assert coordinator.getCommandRoundTrip() is not None
+
+
+async def test_reply_with_error(hass: Any) -> None:
+    """A reply with an errno raises CommandError."""
+    bridge = FakeBridge()
+    coordinator = CN360Coordinator(hass, bridge, SN)
+    task = asyncio.create_task(coordinator.sendCommand(21014, {}, wait=True))
+    await _sent(bridge)
+
+    coordinator.async_handle_message(_reply(21014, errno=5))
+    with pytest.raises(CommandError, match="error 5"):
+        await task
+
+
+async def test_reply_timeout(hass: Any) -> None:
+    """A command without a reply raises CommandError after the timeout."""
+    coordinator = CN360Coordinator(hass, FakeBridge(), SN)
+
+    with pytest.raises(CommandError, match="No response"):
+        await coordinator.sendCommand(21014, {}, wait=True, timeout=0.01)
+    assert coordinator.getCommandRoundTrip() is None
+
+
+async def test_connection_lost_while_waiting(hass: Any) -> None:
+    """Losing the connection fails waiting commands and rolls back values."""
+    bridge = FakeBridge()
+    coordinator = CN360Coordinator(hass, bridge, SN)
+    coordinator._apply_update({"workNoisy": 1})
+    task = asyncio.create_task(
+        coordinator.sendCommand(
+            21022, {"cmd": 2}, wait=True, optimistic={"workNoisy": 2}
+        )
+    )
+    await _sent(bridge)
+    assert coordinator.getRobotData()["workNoisy"] == 2
+
+    coordinator.async_set_bridge_connected(False)
+    with pytest.raises(CommandError, match="Connection lost"):
+        await task
+    assert coordinator.getRobotData()["workNoisy"] == 1
+
+
+async def test_not_connected(hass: Any) -> None:
+    """A waiting command that cannot be sent raises CommandError."""
+    bridge = FakeBridge()
+    bridge.connected = False
+    coordinator = CN360Coordinator(hass, bridge, SN)
+
+    with pytest.raises(CommandError, match="Not connected"):
+        await coordinator.sendCommand(21014, {}, wait=True)
+
+
+async def test_status_request_measures_round_trip(hass: Any) -> None:
+    """The status request sent on connect waits for its reply."""
+    bridge = FakeBridge()
+    coordinator = CN360Coordinator(hass, bridge, SN)
+
+    coordinator.async_handle_message(RobotMessage(SN, True, True, None, None, {}, {}))
+    await _sent(bridge, 5)
+    assert 21014 in [command["infoType"] for command in bridge.sent]
+
+    coordinator.async_handle_message(_reply(21014))
+    await asyncio.sleep(0)
+    assert coordinator.getCommandRoundTrip() is not None
+
+
+async def test_setpoints_coalesced(hass: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Setpoints within the window collapse, only the latest one follows."""
+    monkeypatch.setattr(coordinator_module, "COMMAND_COALESCE_WINDOW", 0.01)
+    bridge = FakeBridge()
+    coordinator = CN360Coordinator(hass, bridge, SN)
+
+    for volume in (1, 2, 3):
+        await coordinator.sendCommand(21024, {"cmd": "setVolume", "value": volume})
+    await coordinator.sendCommand(21024, {"cmd": "setledswitch", "value": 1})
+    assert [command["data"]["value"] for command in bridge.sent] == [1, 1]
+
+    await asyncio.sleep(0.05)
+    assert [command["data"] for command in bridge.sent] == [
+        {"cmd": "setVolume", "value": 1},
+        {"cmd": "setledswitch", "value": 1},
+        {"cmd": "setVolume", "value": 3},
+    ]
+
+
+async def test_commands_not_coalesced(hass: Any) -> None:
+    """Other commands and waiting commands are all sent."""
+    bridge = FakeBridge()
+    coordinator = CN360Coordinator(hass, bridge, SN)
+
+    for _ in range(2):
+        await coordinator.sendCommand(21024, {"cmd": "reboot"})
+        await coordinator.sendCommand(3010, {})
+    await coordinator.sendCommand(21022, {"cmd": "max"})
+    with pytest.raises(CommandError):
+        await coordinator.sendCommand(21022, {"cmd": "quiet"}, wait=True, timeout=0)
+
+    assert [command["infoType"] for command in bridge.sent] == [
+        21024,
+        3010,
+        21024,
+        3010,
+        21022,
+        21022,
+    ]
+
+
+async def test_optimistic_value_confirmed(hass: Any) -> None:
+    """An optimistic value is shown at once and kept when the robot reports it."""
+    coordinator = CN360Coordinator(hass, FakeBridge(), SN)
+    coordinator._apply_update({"led": 0})
+    updates: list[Any] = []
+    coordinator.async_add_key_listener(
+        lambda: updates.append(coordinator.getRobotData()["led"]), ("led",)
+    )
+
+    await coordinator.sendCommand(
+        21024, {"cmd": "setledswitch", "value": 1}, optimistic={"led": 1}
+    )
+    assert updates == [1]
+
+    coordinator.async_handle_message(
+        RobotMessage(SN, True, True, 20001, None, {"led": 1}, {})
+    )
+    assert coordinator.getRobotData()["led"] == 1
+    assert not coordinator._optimistic
+    assert updates == [1]
+
+
+async def test_optimistic_value_expires(
+    hass: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """An optimistic value the robot does not report is rolled back."""
+    monkeypatch.setattr(coordinator_module, "OPTIMISTIC_TIMEOUT", 0.01)
+    coordinator = CN360Coordinator(hass, FakeBridge(), SN)
+    coordinator._apply_update({"led": 0})
+    updates: list[Any] = []
+    coordinator.async_add_key_listener(
+        lambda: updates.append(coordinator.getRobotData()["led"]), ("led",)
+    )
+
+    await coordinator.sendCommand(
+        21024, {"cmd": "setledswitch", "value": 1}, optimistic={"led": 1}
+    )
+    await asyncio.sleep(0.05)
+    assert updates == [1, 0]
+    assert coordinator.getRobotData()["led"] == 0
+
+
+async def test_optimistic_value_not_sent(hass: Any) -> None:
+    """An optimistic value is rolled back at once if the command is not sent."""
+    bridge = FakeBridge()
+    bridge.connected = False
+    coordinator = CN360Coordinator(hass, bridge, SN)
+    coordinator._apply_update({"volume": 5})
+
+    await coordinator.sendCommand(
+        21024, {"cmd": "setVolume", "value": 9}, optimistic={"volume": 9}
+    )
+    assert coordinator.getRobotData()["volume"] == 5
+    assert not coordinator._optimistic
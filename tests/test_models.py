@@ -0,0 +1,92 @@
+"""Tests for merging robot data updates."""
+
+from __future__ import annotations
+
+from types import ModuleType
+
+
+def _smart_area(*rooms: dict) -> dict:
+    """Return a smartArea value with rooms."""
+    return {"value": list(rooms)}
+
+
+def test_partial_nested_update(models: ModuleType) -> None:
+    """Nested dicts are merged, unchanged values keep their identity."""
+    pos = [1, 2]
+    data = {"pos": pos, "settings": {"a": 1, "b": 2}}
+
+    merged, changed = models.merge_data(data, {"pos": [1, 2], "settings": {"a": 3}})
+
+    assert merged == {"pos": [1, 2], "settings": {"a": 3, "b": 2}}
+    assert merged["pos"] is pos
+    assert changed == {("settings", "a")}
+    assert data["settings"] == {"a": 1, "b": 2}
+
+
+def test_deleted_nested_key(models: ModuleType) -> None:
+    """A nested key set to None is deleted, a top level one is kept."""
+    data = {"errorState": 1, "settings": {"a": 1, "b": 2}}
+
+    merged, changed = models.merge_data(
+        data, {"errorState": None, "settings": {"b": None, "c": None}}
+    )
+
+    assert merged == {"errorState": None, "settings": {"a": 1}}
+    assert changed == {("errorState",), ("settings", "b")}
+
+
+def test_unchanged_update(models: ModuleType) -> None:
+    """An update without changes returns the data itself."""
+    data = {"mode": "sweep", "settings": {"a": 1}}
+
+    merged, changed = models.merge_data(data, {"mode": "sweep", "settings": {}})
+
+    assert merged is data
+    assert changed == set()
+
+
+def test_partial_room_update(models: ModuleType) -> None:
+    """Unchanged rooms keep their identity when one room changes."""
+    kitchen = {"id": 1, "name": "Kitchen"}
+    data = {"smartArea": {"activeIds": [1], **_smart_area(kitchen, {"id": 2})}}
+
+    merged, changed = models.merge_data(
+        data,
+        {"smartArea": _smart_area({"id": 1, "name": "Kitchen"}, {"id": 2, "x": 1})},
+    )
+
+    rooms = merged["smartArea"]["value"]
+    assert changed == {("smartArea", "value", 2)}
+    assert merged["smartArea"]["activeIds"] == [1]
+    assert rooms[0] is kitchen
+    assert rooms[1] == {"id": 2, "x": 1}
+
+
+def test_removed_room(models: ModuleType) -> None:
+    """A room missing from the update is removed."""
+    kitchen = {"id": 1, "name": "Kitchen"}
+    data = {"smartArea": _smart_area(kitchen, {"id": 2, "name": "Hall"})}
+
+    merged, changed = models.merge_data(
+        data, {"smartArea": _smart_area({"id": 1, "name": "Kitchen"})}
+    )
+
+    assert changed == {("smartArea", "value", 2)}
+    assert merged["smartArea"]["value"] == [kitchen]
+    assert merged["smartArea"]["value"][0] is kitchen
+
+
+def test_reordered_rooms(models: ModuleType) -> None:
+    """Reordered rooms change the list, each room keeps its identity."""
+    kitchen = {"id": 1, "name": "Kitchen"}
+    hall = {"id": 2, "name": "Hall"}
+    data = {"smartArea": _smart_area(kitchen, hall)}
+
+    merged, changed = models.merge_data(
+        data, {"smartArea": _smart_area(dict(hall), dict(kitchen))}
+    )
+
+    rooms = merged["smartArea"]["value"]
+    assert changed == {("smartArea", "value")}
+    assert rooms[0] is hall
+    assert rooms[1] is kitchen
@@ -0,0 +1,60 @@
+"""Tests for the frame decoder."""
+
+from __future__ import annotations
+
+from types import ModuleType
+
+PAYLOAD = b'{"infoType": 20001, "data": {"mode": "sweep"}}'
+
+
+def test_frame_fed_in_chunks(protocol: ModuleType) -> None:
+    """A frame split at every byte is returned once complete."""
+    decoder = protocol.FrameDecoder()
+    frame = protocol.encode_frame(PAYLOAD)
+
+    frames = []
+    for i in range(len(frame)):
+        frames += decoder.feed(frame[i : i + 1])
+
+    assert frames == [PAYLOAD]
+    assert decoder.frames == 1
+    assert decoder.discarded == 0
+
+
+def test_frames_in_one_chunk(protocol: ModuleType) -> None:
+    """Several frames and the start of the next are split correctly."""
+    decoder = protocol.FrameDecoder()
+    frame = protocol.encode_frame(PAYLOAD)
+
+    assert decoder.feed(frame + frame + frame[:5]) == [PAYLOAD, PAYLOAD]
+    assert decoder.feed(frame[5:]) == [PAYLOAD]
+
+
+def test_garbage_before_frame(protocol: ModuleType) -> None:
+    """Garbage and a lone half marker before a frame are skipped."""
+    decoder = protocol.FrameDecoder()
+    frame = protocol.encode_frame(PAYLOAD)
+
+    assert decoder.feed(b"garbage\x16") == []
+    assert decoder.feed(b"x" + frame) == [PAYLOAD]
+    assert decoder.discarded == len(b"garbage\x16x")
+
+
+def test_zero_length_header(protocol: ModuleType) -> None:
+    """A marker with a zero length is not a frame."""
+    decoder = protocol.FrameDecoder()
+
+    frames = decoder.feed(b"\x16\x16\x00\x00" + protocol.encode_frame(PAYLOAD))
+
+    assert frames == [PAYLOAD]
+    assert decoder.discarded == 4
+
+
+def test_oversized_header(protocol: ModuleType) -> None:
+    """A marker with a length beyond the data is skipped, not waited for."""
+    decoder = protocol.FrameDecoder()
+
+    frames = decoder.feed(b"\x16\x16\xff\xffgarbage" + protocol.encode_frame(PAYLOAD))
+
+    assert frames == [PAYLOAD]
+    assert decoder.discarded == len(b"\x16\x16\xff\xffgarbage")